@@ -3,16 +3,25 @@ pragma solidity ^0.8.24;
 
 import "@openzeppelin/contracts/token/ERC721/extensions/ERC721URIStorage.sol";
 import "@openzeppelin/contracts/access/AccessControl.sol";
+import "@openzeppelin/contracts/utils/Strings.sol";
 
 /**
  * @title Durian721
  * @notice 标准 ERC721 + AccessControl + ERC721URIStorage 版本
+ *         批量铸造的 token 可以不逐个存 URI：未单独设置 tokenURI 时回退到 sharedBaseURI + tokenId。
  */
 contract Durian721 is ERC721URIStorage, AccessControl {
     // 角色常量
     bytes32 public constant ADMIN_ROLE  = keccak256("ADMIN_ROLE");
     bytes32 public constant FARMER_ROLE = keccak256("FARMER_ROLE");
 
+    // 未单独设置 URI 的 token 使用 sharedBaseURI + tokenId（为空则 tokenURI 返回空串，与原行为一致）
+    string public sharedBaseURI;
+
+    event SharedBaseURISet(string baseUri);
+    // EIP-4906：OZ 4.8 的 _setTokenURI 不发事件，链下缓存靠它得知某个 token 的元数据变了
+    event MetadataUpdate(uint256 _tokenId);
+
     constructor() ERC721("Durian", "DURI") {
         // 部署者为管理员
         _grantRole(ADMIN_ROLE, msg.sender);
@@ -38,6 +47,38 @@ contract Durian721 is ERC721URIStorage, AccessControl {
         }
     }
 
+    /**
+     * @notice 批量铸造连续 tokenId [firstId, firstId + count)，不写逐个 URI（走 sharedBaseURI）
+     */
+    function mintDurianBatch(
+        address to,
+        uint256 firstId,
+        uint256 count
+    ) external onlyRole(FARMER_ROLE) {
+        for (uint256 i = 0; i < count; ) {
+            _safeMint(to, firstId + i);
+            unchecked { ++i; }
+        }
+    }
+
+    /**
+     * @notice 批量铸造任意 tokenId 列表，不写逐个 URI（走 sharedBaseURI）
+     */
+    function mintDurianList(address to, uint256[] calldata tokenIds) external onlyRole(FARMER_ROLE) {
+        for (uint256 i = 0; i < tokenIds.length; ) {
+            _safeMint(to, tokenIds[i]);
+            unchecked { ++i; }
+        }
+    }
+
+    /**
+     * @notice 管理员设置共享 base URI，例如 "ipfs://<dirCID>/"
+     */
+    function setSharedBaseURI(string calldata baseUri) external onlyRole(ADMIN_ROLE) {
+        sharedBaseURI = baseUri;
+        emit SharedBaseURISet(baseUri);
+    }
+
     /**
      * @notice （可选）管理员修改/补充 tokenURI
      */
@@ -46,6 +87,19 @@ contract Durian721 is ERC721URIStorage, AccessControl {
         onlyRole(ADMIN_ROLE)
     {
         _setTokenURI(tokenId, tokenUri);
+        emit MetadataUpdate(tokenId);
+    }
+
+    /**
+     * @notice 单独设置过的 URI 原样返回（不拼接前缀）；否则回退到 sharedBaseURI + tokenId
+     * @dev 不重写 _baseURI：ERC721URIStorage 会把 base 拼到已存的完整 URI 前面
+     */
+    function tokenURI(uint256 tokenId) public view virtual override returns (string memory) {
+        string memory stored = super.tokenURI(tokenId);
+        if (bytes(stored).length != 0 || bytes(sharedBaseURI).length == 0) {
+            return stored;
+        }
+        return string(abi.encodePacked(sharedBaseURI, Strings.toString(tokenId)));
     }
 
     // ---------------- 必要的多重继承 overrides ----------------
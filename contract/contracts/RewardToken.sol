@@ -2,18 +2,21 @@
 pragma solidity ^0.8.24;
 
 import "@openzeppelin/contracts/token/ERC20/ERC20.sol";
+import "@openzeppelin/contracts/token/ERC20/extensions/draft-ERC20Permit.sol";
 import "@openzeppelin/contracts/access/AccessControl.sol";
 
 
 /**
  * @title RewardToken
  * @notice 标准 ERC20 奖励代币。由 Admin 铸造并转入管理合约。
+ *         支持 EIP-2612 permit：离线签名授权，充值时无需单独的 approve 交易。
  */
-contract RewardToken is ERC20, AccessControl {
+contract RewardToken is ERC20, ERC20Permit, AccessControl {
     bytes32 public constant ADMIN_ROLE = keccak256("ADMIN_ROLE");
 
     constructor(string memory name_, string memory symbol_, uint256 initialSupply)
         ERC20(name_, symbol_)
+        ERC20Permit(name_)
     {
         _grantRole(ADMIN_ROLE, msg.sender);
         if (initialSupply > 0) {
@@ -24,4 +27,13 @@ contract RewardToken is ERC20, AccessControl {
     function mint(address to, uint256 amount) external onlyRole(ADMIN_ROLE) {
         _mint(to, amount);
     }
+
+    /// @notice 一笔交易给多个地址铸币（批量开户）
+    function mintBatch(address[] calldata to, uint256[] calldata amounts) external onlyRole(ADMIN_ROLE) {
+        require(to.length == amounts.length, "length mismatch");
+        for (uint256 i = 0; i < to.length; ) {
+            _mint(to[i], amounts[i]);
+            unchecked { ++i; }
+        }
+    }
 }
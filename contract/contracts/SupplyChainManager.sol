@@ -5,6 +5,8 @@ import "@openzeppelin/contracts/security/ReentrancyGuard.sol";
 import "@openzeppelin/contracts/access/AccessControl.sol";
 import "@openzeppelin/contracts/security/Pausable.sol";
 import "@openzeppelin/contracts/token/ERC20/utils/SafeERC20.sol";
+import "@openzeppelin/contracts/token/ERC20/extensions/draft-IERC20Permit.sol";
+import "@openzeppelin/contracts/utils/cryptography/MerkleProof.sol";
 
 interface IRewardToken {
     function transfer(address to, uint256 amount) external returns (bool);
@@ -20,7 +22,9 @@ interface IDurian721 {
  * @notice 五阶段提交流程 + 延迟奖励编排：
  *         - phase ∈ {1..5}，后一环核验前一环；phase=5 走 7 天时间锁后可领。
  *         - 事件带 CID（不进存储），链上仅存 dataHash 与少量元数据。
- *         - 位图 flags 管理 submitted/verified/claimed 状态（各占 5 bit）。
+ *         - 每个 (tokenId, phase) 的 submitted/verified/claimed 状态与零售解锁时间
+ *           和提交者/时间同放在一个 SubmitMeta 槽里；getFlags 仍按原 5 bit × 3 的位图布局返回。
+ *         - 另有按 epoch 发布 Merkle 根的批量派奖：一个证明 + 一次转账领取某地址在该 epoch 的全部奖励。
  */
 contract SupplyChainManager is AccessControl, Pausable, ReentrancyGuard {
     using SafeERC20 for IERC20;
@@ -39,20 +43,44 @@ contract SupplyChainManager is AccessControl, Pausable, ReentrancyGuard {
     IERC20 public immutable rewardToken;
     IDurian721 public immutable nft;
     uint256 public retailLockPeriod = 7 days;
+    /// @notice retailLockPeriod 的上限（约 136 年）。
+    /// @dev unlockAt 以 uint40 存在 SubmitMeta 里，block.timestamp + retailLockPeriod 必须能放进 uint40；
+    ///      不设上限时，过大的值会在 phase 5 提交时被截断成一个更早的解锁时间，等于悄悄缩短甚至关掉时间锁。
+    uint256 public constant MAX_RETAIL_LOCK_PERIOD = type(uint32).max;
 
     // phase 奖励金额
     mapping(uint8 => uint256) public rewardForPhase; // 1..5
 
-    // tokenId => flags 位图（低 5 位：submitted；第 8~12 位：verified；第 16~20 位：claimed）
-    mapping(uint256 => uint32) private _flags;
-
-    // phase 提交者与时间（占 1 槽）
+    // SubmitMeta.status 位
+    uint8 private constant SUBMITTED = 1;
+    uint8 private constant VERIFIED  = 2;
+    uint8 private constant CLAIMED   = 4;
+
+    // phase 提交者、时间、状态位与零售解锁时间（占 1 槽：20 + 5 + 5 + 1 = 31B）
+    // 提交 / 核验 / 领取都只触碰这一个槽（外加提交时的 phaseData）
+    //
+    // 与旧布局（_flags 位图 + retailReadyAt 各占独立槽）相比，每项的存储开销
+    // （EIP-2929/2200 冷读 2100、0→非0 写 22100、非0→非0 写 5000；不含 calldata、事件与交易基础费）：
+    //   操作                       旧布局   新布局    差值
+    //   submit phase 1（首个）      88400    66300   -22100
+    //   submit phase 2~4           71300    66300    -5000
+    //   submit phase 5             93400    66300   -27100
+    //   verify                      5000     5000        0
+    //   claim phase 1~4             7100     5000    -2100
+    //   claim phase 5               9200     5000    -4200
+    //   getFlags / 每个 tokenId     2100    10500    +8400（只读：5 个 phase 各读一槽）
+    //   （以上 submit 按 packedData ≠ 0 计；packedData = 0 时新布局跳过第二个槽，再省 2200）
+    // 表中是按 opcode 定价推算的存储部分，不是实测值；整笔交易的实测对比用 scripts/bench_supply_chain.py
+    // （在旧合约上以 `main baseline` 保存基线，换回新合约后再运行 `main`，Recorder 会逐方法打印差值）。
+    // 代价在只读侧：getFlags / getFlagsBatch / getFlagsRange 每个 token 由 1 次 SLOAD 变为 5 次，
+    // 只影响 eth_call（链下轮询），200 个 token 一批约 2.1M gas，远低于节点的 eth_call gas 上限。
     struct SubmitMeta {
         address submitter;   // 20B
-        uint64 submittedAt;  // 8B
-        uint32 reserved;     // 4B 填充
+        uint40 submittedAt;  // 5B
+        uint40 unlockAt;     // 5B 仅 phase=5：零售时间锁
+        uint8 status;        // 1B SUBMITTED | VERIFIED | CLAIMED
     }
-    mapping(uint256 => mapping(uint8 => SubmitMeta)) public submitMeta; // tokenId => phase => meta
+    mapping(uint256 => mapping(uint8 => SubmitMeta)) private _meta; // tokenId => phase => meta
 
     // phase 数据：仅 dataHash + packedData（自定义打包多个数值）
     struct PhaseData {
@@ -61,8 +89,21 @@ contract SupplyChainManager is AccessControl, Pausable, ReentrancyGuard {
     }
     mapping(uint256 => mapping(uint8 => PhaseData)) public phaseData; // tokenId => phase => data
 
-    // Retail 时间锁：phase=5 提交时设定
-    mapping(uint256 => uint64) public retailReadyAt; // unlock timestamp
+    // Merkle 派奖：epoch => root；叶子 = keccak256(keccak256(abi.encode(epoch, account, amount, tokenIds, phases)))
+    uint256 public merkleEpoch;
+    mapping(uint256 => bytes32) public merkleRoots;
+
+    // 批量只读视图的返回结构：单个 phase 的完整状态
+    struct PhaseView {
+        bool submitted;
+        bool verified;
+        bool claimed;
+        address submitter;
+        uint64 submittedAt;
+        bytes32 dataHash;
+        uint256 packedData;
+        uint256 reward;
+    }
 
     // --------- 事件（CID 只放这里，不入存储） ---------
     event PhaseSubmitted(
@@ -82,6 +123,14 @@ contract SupplyChainManager is AccessControl, Pausable, ReentrancyGuard {
     event RewardWithdrawn(address indexed to, uint256 amount);
     event RewardForPhaseSet(uint8 indexed phase, uint256 amount);
     event RetailLockPeriodSet(uint256 seconds_);
+    event MerkleRootPublished(uint256 indexed epoch, bytes32 root);
+    event MerkleRewardClaimed(
+        uint256 indexed epoch,
+        address indexed to,
+        uint256 amount,
+        uint256[] tokenIds,
+        uint8[] phases
+    );
 
     // --------- 构造 ---------
     constructor(address rewardToken_, address nft_) {
@@ -110,8 +159,11 @@ contract SupplyChainManager is AccessControl, Pausable, ReentrancyGuard {
         emit RewardForPhaseSet(phase, amount);
     }
 
+    /// @notice 设置零售（phase 5）时间锁时长，只影响之后提交的 phase 5
+    /// @dev 行为变化：seconds_ > MAX_RETAIL_LOCK_PERIOD 时 revert "too long"（此前任何非零值都接受）
     function setRetailLockPeriod(uint256 seconds_) external onlyRole(ADMIN_ROLE) {
         require(seconds_ > 0, "zero");
+        require(seconds_ <= MAX_RETAIL_LOCK_PERIOD, "too long");
         retailLockPeriod = seconds_;
         emit RetailLockPeriodSet(seconds_);
     }
@@ -122,11 +174,39 @@ contract SupplyChainManager is AccessControl, Pausable, ReentrancyGuard {
         emit RewardFunded(msg.sender, amount);
     }
 
+    /**
+     * @notice 用 EIP-2612 签名授权并充值，一笔交易完成 approve + fundRewards。
+     *         permit 被抢先提交（nonce 已用）时，只要授权额度足够仍可继续。
+     */
+    function fundRewardsWithPermit(
+        uint256 amount,
+        uint256 deadline,
+        uint8 v,
+        bytes32 r,
+        bytes32 s
+    ) external onlyRole(ADMIN_ROLE) {
+        try IERC20Permit(address(rewardToken)).permit(msg.sender, address(this), amount, deadline, v, r, s) {
+        } catch {
+            require(rewardToken.allowance(msg.sender, address(this)) >= amount, "permit failed");
+        }
+        rewardToken.safeTransferFrom(msg.sender, address(this), amount);
+        emit RewardFunded(msg.sender, amount);
+    }
+
     function withdrawRewards(address to, uint256 amount) external onlyRole(ADMIN_ROLE) {
         rewardToken.safeTransfer(to, amount);
         emit RewardWithdrawn(to, amount);
     }
 
+    /// @notice 发布下一个 epoch 的 Merkle 根（epoch 必须等于 merkleEpoch + 1，防止误发覆盖）
+    function publishMerkleRoot(uint256 epoch, bytes32 root) external onlyRole(ADMIN_ROLE) {
+        require(epoch == merkleEpoch + 1, "bad epoch");
+        require(root != bytes32(0), "zero root");
+        merkleEpoch = epoch;
+        merkleRoots[epoch] = root;
+        emit MerkleRootPublished(epoch, root);
+    }
+
     function pause() external onlyRole(ADMIN_ROLE) { _pause(); }
     function unpause() external onlyRole(ADMIN_ROLE) { _unpause(); }
 
@@ -151,38 +231,191 @@ contract SupplyChainManager is AccessControl, Pausable, ReentrancyGuard {
     ) external whenNotPaused nonReentrant {
         _checkPhase(phase);
         _checkRole(_roleForPhase(phase), msg.sender);
+        _submit(tokenId, phase, dataHash, packedData, cid);
+    }
+
+    /**
+     * @notice 核验上一阶段（phase ∈ {1..4}），调用者必须是“下一阶段”的角色。
+     *         例如核验 phase=2（Harvest），需要 Packer 角色（phase=3）。
+     */
+    function verifyPhase(uint256 tokenId, uint8 phase)
+        external
+        whenNotPaused
+        nonReentrant
+    {
+        _checkVerifyPhase(phase);
+        // 例如核验 2 -> 要有 3 的角色
+        _checkRole(_roleForPhase(phase + 1), msg.sender);
+        _verify(tokenId, phase);
+    }
+
+    /**
+     * @notice 领取某阶段奖励：
+     *         - phase ∈ {1..4}：必须已通过 verify；
+     *         - phase = 5：必须到达零售时间锁 unlock；
+     *         - 仅限该阶段提交者领取；每阶段仅可领取一次。
+     */
+    function claimReward(uint256 tokenId, uint8 phase)
+        external
+        whenNotPaused
+        nonReentrant
+    {
+        _checkPhase(phase);
+        uint256 amt = _claim(tokenId, phase);
+        if (amt > 0) {
+            rewardToken.safeTransfer(msg.sender, amt);
+        }
+    }
+
+    // --------- 批量 提交 / 核验 / 领取 ---------
+    // 一笔交易处理多个 (tokenId, phase)：重入锁只进一次，同一 phase 的角色只校验一次，
+    // 领取时合并为一次转账；每一项仍发出与单笔调用相同的事件。
+
+    function submitPhaseBatch(
+        uint256[] calldata tokenIds,
+        uint8[] calldata phases,
+        bytes32[] calldata dataHashes,
+        uint256[] calldata packedData,
+        string[] calldata cids
+    ) external whenNotPaused nonReentrant {
+        uint256 n = tokenIds.length;
+        require(
+            phases.length == n && dataHashes.length == n && packedData.length == n && cids.length == n,
+            "length mismatch"
+        );
+        uint32 checked; // 已校验过角色的 phase 位图
+        for (uint256 i = 0; i < n; ) {
+            uint8 phase = phases[i];
+            _checkPhase(phase);
+            if ((checked & _mask(phase)) == 0) {
+                _checkRole(_roleForPhase(phase), msg.sender);
+                checked |= _mask(phase);
+            }
+            _submit(tokenIds[i], phase, dataHashes[i], packedData[i], cids[i]);
+            unchecked { ++i; }
+        }
+    }
 
+    function verifyPhaseBatch(uint256[] calldata tokenIds, uint8[] calldata phases)
+        external
+        whenNotPaused
+        nonReentrant
+    {
+        uint256 n = tokenIds.length;
+        require(phases.length == n, "length mismatch");
+        uint32 checked;
+        for (uint256 i = 0; i < n; ) {
+            uint8 phase = phases[i];
+            _checkVerifyPhase(phase);
+            if ((checked & _mask(phase)) == 0) {
+                _checkRole(_roleForPhase(phase + 1), msg.sender);
+                checked |= _mask(phase);
+            }
+            _verify(tokenIds[i], phase);
+            unchecked { ++i; }
+        }
+    }
+
+    function claimRewardBatch(uint256[] calldata tokenIds, uint8[] calldata phases)
+        external
+        whenNotPaused
+        nonReentrant
+    {
+        uint256 n = tokenIds.length;
+        require(phases.length == n, "length mismatch");
+        uint256 total;
+        for (uint256 i = 0; i < n; ) {
+            _checkPhase(phases[i]);
+            total += _claim(tokenIds[i], phases[i]);
+            unchecked { ++i; }
+        }
+        if (total > 0) {
+            rewardToken.safeTransfer(msg.sender, total);
+        }
+    }
+
+    // --------- Merkle 批量派奖 ---------
+
+    /**
+     * @notice 凭 Merkle 证明一次领取 account 在 epoch 内的全部奖励（可由任何人代为提交，奖励只转给 account）。
+     *         叶子里的每个 (tokenId, phase) 仍逐项校验提交者 / 已验证 / 零售时间锁并打上 claimed 位，
+     *         因此与 claimReward / claimRewardBatch 互斥：其中任一项已领过则整笔 revert。
+     * @param amount 叶子承诺的总金额（离线按发布时的 rewardForPhase 汇总）
+     */
+    function claimMerkle(
+        uint256 epoch,
+        address account,
+        uint256 amount,
+        uint256[] calldata tokenIds,
+        uint8[] calldata phases,
+        bytes32[] calldata proof
+    ) external whenNotPaused nonReentrant {
+        uint256 n = tokenIds.length;
+        require(n > 0 && phases.length == n, "length mismatch");
+        bytes32 root = merkleRoots[epoch];
+        require(root != bytes32(0), "unknown epoch");
+
+        bytes32 leaf = keccak256(bytes.concat(keccak256(abi.encode(epoch, account, amount, tokenIds, phases))));
+        require(MerkleProof.verifyCalldata(proof, root, leaf), "bad proof");
+
+        for (uint256 i = 0; i < n; ) {
+            uint8 phase = phases[i];
+            _checkPhase(phase);
+            _markClaimed(tokenIds[i], phase, account);
+            unchecked { ++i; }
+        }
+
+        emit MerkleRewardClaimed(epoch, account, amount, tokenIds, phases);
+        if (amount > 0) {
+            rewardToken.safeTransfer(account, amount);
+        }
+    }
+
+    // --------- 内部：提交 / 核验 / 领取（调用方负责 phase 与角色校验） ---------
+
+    function _submit(
+        uint256 tokenId,
+        uint8 phase,
+        bytes32 dataHash,
+        uint256 packedData,
+        string calldata cid
+    ) internal {
         // 可选的所有权/存在性校验：只要求 token 存在且有人拥有
         // 若你希望更严格，可在 Durian721 增加 exists()；此处用 ownerOf 失败即 revert
         nft.ownerOf(tokenId);
 
         // 不可重复提交同一 phase（如需要“允许覆盖”，可改为允许覆盖并做事件记录）
-        require(!_isSubmitted(tokenId, phase), "already submitted");
-
-        // 记录 minimal 数据
-        phaseData[tokenId][phase] = PhaseData({
-            dataHash: dataHash,
-            packedData: packedData
-        });
-
-        submitMeta[tokenId][phase] = SubmitMeta({
-            submitter: msg.sender,
-            submittedAt: uint64(block.timestamp),
-            reserved: 0
-        });
-
-        _setSubmitted(tokenId, phase);
+        SubmitMeta storage sm = _meta[tokenId][phase];
+        require((sm.status & SUBMITTED) == 0, "already submitted");
+
+        // 记录 minimal 数据；packedData 为 0 时不写第二个槽
+        PhaseData storage pd = phaseData[tokenId][phase];
+        pd.dataHash = dataHash;
+        if (packedData != 0) {
+            pd.packedData = packedData;
+        }
 
         // Phase 1 自动验证（无前置阶段）
+        uint8 status = SUBMITTED;
         if (phase == 1) {
-            _setVerified(tokenId, phase);
+            status |= VERIFIED;
+        }
+
+        // 若为 Retail（phase=5），设置时间锁并自动验证（只需等时间锁）
+        uint40 unlock;
+        if (phase == 5) {
+            unlock = uint40(block.timestamp + retailLockPeriod);
+            status |= VERIFIED;
         }
 
-        // 若为 Retail（phase=5），设置时间锁并自动验证
+        _meta[tokenId][phase] = SubmitMeta({
+            submitter: msg.sender,
+            submittedAt: uint40(block.timestamp),
+            unlockAt: unlock,
+            status: status
+        });
+
         if (phase == 5) {
-            uint64 unlock = uint64(block.timestamp + retailLockPeriod);
-            retailReadyAt[tokenId] = unlock;
-            _setVerified(tokenId, phase); // Phase 5 自动验证，只需等时间锁
             emit RetailReadySet(tokenId, unlock);
         }
 
@@ -197,65 +430,103 @@ contract SupplyChainManager is AccessControl, Pausable, ReentrancyGuard {
         );
     }
 
-    /**
-     * @notice 核验上一阶段（phase ∈ {1..4}），调用者必须是“下一阶段”的角色。
-     *         例如核验 phase=2（Harvest），需要 Packer 角色（phase=3）。
-     */
-    function verifyPhase(uint256 tokenId, uint8 phase)
-        external
-        whenNotPaused
-        nonReentrant
-    {
-        require(phase >= MIN_PHASE && phase < MAX_PHASE, "phase out of range");
-        // 例如核验 2 -> 要有 3 的角色
-        bytes32 nextRole = _roleForPhase(phase + 1);
-        _checkRole(nextRole, msg.sender);
+    function _verify(uint256 tokenId, uint8 phase) internal {
+        SubmitMeta storage sm = _meta[tokenId][phase];
+        uint8 status = sm.status;
+        require((status & SUBMITTED) != 0, "not submitted");
+        require((status & VERIFIED) == 0, "already verified");
 
-        require(_isSubmitted(tokenId, phase), "not submitted");
-        require(!_isVerified(tokenId, phase), "already verified");
-
-        _setVerified(tokenId, phase);
+        sm.status = status | VERIFIED;
 
         emit PhaseVerified(tokenId, phase, msg.sender, uint64(block.timestamp));
     }
 
-    /**
-     * @notice 领取某阶段奖励：
-     *         - phase ∈ {1..4}：必须已通过 verify；
-     *         - phase = 5：必须到达零售时间锁 unlock；
-     *         - 仅限该阶段提交者领取；每阶段仅可领取一次。
-     */
-    function claimReward(uint256 tokenId, uint8 phase)
-        external
-        whenNotPaused
-        nonReentrant
-    {
-        _checkPhase(phase);
+    /// @dev 校验并标记已领取，返回应付金额；转账由调用方完成
+    function _claim(uint256 tokenId, uint8 phase) internal returns (uint256 amt) {
+        _markClaimed(tokenId, phase, msg.sender);
+        amt = rewardForPhase[phase];
+        emit RewardClaimed(tokenId, phase, msg.sender, amt);
+    }
 
-        SubmitMeta memory sm = submitMeta[tokenId][phase];
-        require(sm.submitter == msg.sender, "not submitter");
-        require(!_isClaimed(tokenId, phase), "already claimed");
+    /// @dev 领取条件：account 为提交者、未领过、已验证（phase=5 为时间锁到期）；通过后打上 CLAIMED 位
+    function _markClaimed(uint256 tokenId, uint8 phase, address account) internal {
+        SubmitMeta storage sm = _meta[tokenId][phase];
+        SubmitMeta memory m = sm;
+        require(m.submitter == account, "not submitter");
+        require((m.status & CLAIMED) == 0, "already claimed");
 
         if (phase == 5) {
-            uint64 unlock = retailReadyAt[tokenId];
-            require(unlock != 0 && block.timestamp >= unlock, "retail locked");
+            require(m.unlockAt != 0 && block.timestamp >= m.unlockAt, "retail locked");
         } else {
-            require(_isVerified(tokenId, phase), "not verified");
+            require((m.status & VERIFIED) != 0, "not verified");
         }
 
-        _setClaimed(tokenId, phase);
+        sm.status = m.status | CLAIMED;
+    }
 
-        uint256 amt = rewardForPhase[phase];
-        if (amt > 0) {
-            rewardToken.safeTransfer(msg.sender, amt);
+    // --------- 只读辅助 ---------
+    function getFlags(uint256 tokenId) external view returns (uint32) {
+        return _flags(tokenId);
+    }
+
+    /// @notice 与旧版 public mapping 相同的 getter：(submitter, submittedAt, reserved)
+    function submitMeta(uint256 tokenId, uint8 phase)
+        external
+        view
+        returns (address submitter, uint64 submittedAt, uint32 reserved)
+    {
+        SubmitMeta memory m = _meta[tokenId][phase];
+        return (m.submitter, m.submittedAt, 0);
+    }
+
+    /// @notice 零售解锁时间（phase=5 提交时设定，未提交为 0）
+    function retailReadyAt(uint256 tokenId) external view returns (uint64) {
+        return _meta[tokenId][MAX_PHASE].unlockAt;
+    }
+
+    /**
+     * @notice 一次返回 token 的完整履历：5 个阶段的 flags / 提交者 / 时间 / dataHash / packedData / 奖励，
+     *         以及零售解锁时间（代替 5 次 phaseStatus + submitMeta + phaseData + retailReadyAt）。
+     */
+    function getProvenance(uint256 tokenId)
+        external
+        view
+        returns (uint32 flags, uint64 retailUnlock, PhaseView[5] memory phases)
+    {
+        for (uint8 phase = MIN_PHASE; phase <= MAX_PHASE; ++phase) {
+            SubmitMeta memory sm = _meta[tokenId][phase];
+            PhaseData memory pd = phaseData[tokenId][phase];
+            flags |= _phaseFlags(sm.status, phase);
+            phases[phase - 1] = PhaseView({
+                submitted: (sm.status & SUBMITTED) != 0,
+                verified: (sm.status & VERIFIED) != 0,
+                claimed: (sm.status & CLAIMED) != 0,
+                submitter: sm.submitter,
+                submittedAt: sm.submittedAt,
+                dataHash: pd.dataHash,
+                packedData: pd.packedData,
+                reward: rewardForPhase[phase]
+            });
         }
+        retailUnlock = _meta[tokenId][MAX_PHASE].unlockAt;
+    }
 
-        emit RewardClaimed(tokenId, phase, msg.sender, amt);
+    /// @notice 多个 tokenId 的 flags 位图（布局同 getFlags）
+    function getFlagsBatch(uint256[] calldata tokenIds) external view returns (uint32[] memory flags) {
+        flags = new uint32[](tokenIds.length);
+        for (uint256 i = 0; i < tokenIds.length; ) {
+            flags[i] = _flags(tokenIds[i]);
+            unchecked { ++i; }
+        }
     }
 
-    // --------- 只读辅助 ---------
-    function getFlags(uint256 tokenId) external view returns (uint32) {
-        return _flags[tokenId];
+    /// @notice 连续 tokenId 区间 [startId, startId + count) 的 flags，用于分页加载列表
+    function getFlagsRange(uint256 startId, uint256 count) external view returns (uint32[] memory flags) {
+        flags = new uint32[](count);
+        for (uint256 i = 0; i < count; ) {
+            flags[i] = _flags(startId + i);
+            unchecked { ++i; }
+        }
     }
 
     function phaseStatus(uint256 tokenId, uint8 phase)
@@ -263,11 +534,12 @@ contract SupplyChainManager is AccessControl, Pausable, ReentrancyGuard {
         view
         returns (bool submitted, bool verified, bool claimed, address submitter, uint64 submittedAt)
     {
-        submitted   = _isSubmitted(tokenId, phase);
-        verified    = _isVerified(tokenId, phase);
-        claimed     = _isClaimed(tokenId, phase);
-        submitter   = submitMeta[tokenId][phase].submitter;
-        submittedAt = submitMeta[tokenId][phase].submittedAt;
+        SubmitMeta memory m = _meta[tokenId][phase];
+        submitted   = (m.status & SUBMITTED) != 0;
+        verified    = (m.status & VERIFIED) != 0;
+        claimed     = (m.status & CLAIMED) != 0;
+        submitter   = m.submitter;
+        submittedAt = m.submittedAt;
     }
 
     // --------- 内部：位图 & 角色 & 校验 ---------
@@ -276,6 +548,10 @@ contract SupplyChainManager is AccessControl, Pausable, ReentrancyGuard {
         require(phase >= MIN_PHASE && phase <= MAX_PHASE, "bad phase");
     }
 
+    function _checkVerifyPhase(uint8 phase) internal pure {
+        require(phase >= MIN_PHASE && phase < MAX_PHASE, "phase out of range");
+    }
+
     function _roleForPhase(uint8 phase) internal pure returns (bytes32 r) {
         if (phase == 1) return FARMER_ROLE;
         if (phase == 2) return FARMER_ROLE;
@@ -285,7 +561,7 @@ contract SupplyChainManager is AccessControl, Pausable, ReentrancyGuard {
         revert("bad phase");
     }
 
-    // bit layout:
+    // getFlags 位图布局（由各 phase 的 status 拼出）:
     // submitted: bits [0..4]
     // verified : bits [8..12]
     // claimed  : bits [16..20]
@@ -294,27 +570,17 @@ contract SupplyChainManager is AccessControl, Pausable, ReentrancyGuard {
         return uint32(1) << (phase - 1);
     }
 
-    function _isSubmitted(uint256 tokenId, uint8 phase) internal view returns (bool) {
-        return (_flags[tokenId] & (_mask(phase))) != 0;
+    function _phaseFlags(uint8 status, uint8 phase) internal pure returns (uint32 f) {
+        uint32 m = _mask(phase);
+        if ((status & SUBMITTED) != 0) f |= m;
+        if ((status & VERIFIED) != 0) f |= m << 8;
+        if ((status & CLAIMED) != 0) f |= m << 16;
     }
 
-    function _isVerified(uint256 tokenId, uint8 phase) internal view returns (bool) {
-        return (_flags[tokenId] & (_mask(phase) << 8)) != 0;
-    }
-
-    function _isClaimed(uint256 tokenId, uint8 phase) internal view returns (bool) {
-        return (_flags[tokenId] & (_mask(phase) << 16)) != 0;
-    }
-
-    function _setSubmitted(uint256 tokenId, uint8 phase) internal {
-        _flags[tokenId] |= _mask(phase);
-    }
-
-    function _setVerified(uint256 tokenId, uint8 phase) internal {
-        _flags[tokenId] |= (_mask(phase) << 8);
-    }
-
-    function _setClaimed(uint256 tokenId, uint8 phase) internal {
-        _flags[tokenId] |= (_mask(phase) << 16);
+    /// @dev 由 5 个 SubmitMeta 槽拼出旧版位图：每个 token 5 次 SLOAD（写路径因此各省一个槽，见 SubmitMeta 注释）
+    function _flags(uint256 tokenId) internal view returns (uint32 f) {
+        for (uint8 phase = MIN_PHASE; phase <= MAX_PHASE; ++phase) {
+            f |= _phaseFlags(_meta[tokenId][phase].status, phase);
+        }
     }
 }
@@ -0,0 +1,147 @@
+"""
+SupplyChainManager 单笔 vs 批量 gas 对比
+
+对 batch size = 1 / 10 / 100 / 500，在同一快照上分别用单笔与批量接口完成
+submit（phase 1）、verify（phase 2）、claim（phase 1）以及零售 phase 5 的 submit/claim，打印总 gas 与每项 gas；
+另外对比逐项 claimReward 与一次 claimMerkle（Merkle 派奖）领取同样 n 项。
+
+    brownie run scripts/bench_supply_chain.py main
+    brownie run scripts/bench_supply_chain.py main 1 10 50
+
+结果写入 reports/gas/bench_supply_chain.json，并与 gas-baseline/ 下的基线比较；
+在改动合约前先以 `main baseline` 运行一次即可保存当前版本的基线。对比两个合约版本：
+
+    git show <旧版本>:contract/contracts/SupplyChainManager.sol > contracts/SupplyChainManager.sol
+    brownie run scripts/bench_supply_chain.py main baseline
+    git checkout contracts/SupplyChainManager.sol
+    brownie run scripts/bench_supply_chain.py main
+
+旧合约没有 claimMerkle 时自动跳过 merkle 一项，其余方法名一致，可直接逐项比较。
+"""
+from brownie import accounts, chain, web3
+
+from scripts.instrument import Recorder
+from scripts.merkle import MerkleTree, leaf_hash
+from scripts.supply_chain import deploy_stack, fund_rewards, grant_roles, mint_durians
+
+BATCH_SIZES = (1, 10, 100, 500)
+SAMPLE_CID = "bafybeigdyrzt5sfp7udm7hu76uh7y26nf3efuylqabf3oclgtqy55fbzdi"
+
+
+def _items(n, phase):
+    ids = list(range(1, n + 1))
+    hashes = [web3.keccak(text=f"{i}:{phase}") for i in ids]
+    packed = [(2950 << 176) | (8200 << 96) | (i * 100) for i in ids]
+    return ids, [phase] * n, hashes, packed, [SAMPLE_CID] * n
+
+
+def _submit_batch(manager, owner, n, phase):
+    return manager.submitPhaseBatch(*_items(n, phase), {'from': owner})
+
+
+def _total(recorder, method, txs):
+    for tx in txs:
+        recorder.add_receipt(method, tx, 0.0)
+    return sum(tx.gas_used for tx in txs)
+
+
+def bench(manager, owner, n, recorder):
+    rows = []
+
+    # submit：phase 1
+    ids, phases, hashes, packed, cids = _items(n, 1)
+    chain.revert()
+    single = _total(recorder, "submitPhase", [
+        manager.submitPhase(ids[i], 1, hashes[i], packed[i], cids[i], {'from': owner}) for i in range(n)
+    ])
+    chain.revert()
+    batch = _total(recorder, f"submitPhaseBatch[{n}]", [_submit_batch(manager, owner, n, 1)])
+    rows.append(("submit", n, single, batch))
+
+    # verify：先批量提交 phase 1、2，再核验 phase 2
+    chain.revert()
+    _submit_batch(manager, owner, n, 1)
+    _submit_batch(manager, owner, n, 2)
+    single = _total(recorder, "verifyPhase", [manager.verifyPhase(i, 2, {'from': owner}) for i in ids])
+    chain.revert()
+    _submit_batch(manager, owner, n, 1)
+    _submit_batch(manager, owner, n, 2)
+    batch = _total(recorder, f"verifyPhaseBatch[{n}]", [manager.verifyPhaseBatch(ids, [2] * n, {'from': owner})])
+    rows.append(("verify", n, single, batch))
+
+    # claim：phase 1 提交即自动验证
+    chain.revert()
+    _submit_batch(manager, owner, n, 1)
+    single = _total(recorder, "claimReward", [manager.claimReward(i, 1, {'from': owner}) for i in ids])
+    chain.revert()
+    _submit_batch(manager, owner, n, 1)
+    batch = _total(recorder, f"claimRewardBatch[{n}]", [manager.claimRewardBatch(ids, [1] * n, {'from': owner})])
+    rows.append(("claim", n, single, batch))
+
+    # merkle：同样 n 项 phase 1，发布根后一次证明领取（单叶子树，证明为空）
+    if not hasattr(manager, "claimMerkle"):
+        return rows + _bench_retail(manager, owner, n, recorder, ids)
+    chain.revert()
+    _submit_batch(manager, owner, n, 1)
+    amount = manager.rewardForPhase(1) * n
+    leaf = leaf_hash(1, owner.address, amount, ids, [1] * n)
+    tree = MerkleTree([leaf])
+    manager.publishMerkleRoot(1, tree.root, {'from': owner})
+    merkle = _total(recorder, f"claimMerkle[{n}]", [
+        manager.claimMerkle(1, owner, amount, ids, [1] * n, tree.proof(leaf), {'from': owner})
+    ])
+    rows.append(("merkle", n, single, merkle))
+    return rows + _bench_retail(manager, owner, n, recorder, ids)
+
+
+def _bench_retail(manager, owner, n, recorder, ids):
+    rows = []
+    # retail：phase 5 提交会写入时间锁，领取要等解锁
+    ids5, phases5, hashes5, packed5, cids5 = _items(n, 5)
+    chain.revert()
+    single = _total(recorder, "submitPhase(5)", [
+        manager.submitPhase(ids5[i], 5, hashes5[i], packed5[i], cids5[i], {'from': owner}) for i in range(n)
+    ])
+    chain.sleep(manager.retailLockPeriod() + 1)
+    claim_single = _total(recorder, "claimReward(5)", [manager.claimReward(i, 5, {'from': owner}) for i in ids])
+    chain.revert()
+    batch = _total(recorder, f"submitPhaseBatch(5)[{n}]", [_submit_batch(manager, owner, n, 5)])
+    chain.sleep(manager.retailLockPeriod() + 1)
+    claim_batch = _total(recorder, f"claimRewardBatch(5)[{n}]", [
+        manager.claimRewardBatch(ids, [5] * n, {'from': owner})
+    ])
+    rows.append(("submit5", n, single, batch))
+    rows.append(("claim5", n, claim_single, claim_batch))
+    return rows
+
+
+def main(*sizes):
+    save_baseline = "baseline" in sizes
+    sizes = tuple(int(s) for s in sizes if s != "baseline") or BATCH_SIZES
+    owner = accounts[0]
+    recorder = Recorder("bench_supply_chain")
+
+    print("\n🚀 Deploying RewardToken / Durian721 / SupplyChainManager...")
+    reward_token, nft, manager = deploy_stack(owner)
+    grant_roles(nft, manager, owner)
+    n_tokens = max(sizes)
+    print(f"🌱 Minting {n_tokens} durians...")
+    mint_durians(nft, owner, range(1, n_tokens + 1))
+    fund_rewards(reward_token, manager, owner, 5 * 10 * 10 ** 18 * n_tokens)
+    chain.snapshot()
+
+    rows = []
+    for n in sizes:
+        rows.extend(bench(manager, owner, n, recorder))
+    chain.revert()
+
+    print("\n⛽ Gas: single-item calls vs batch")
+    print(f"  {'op':8s} {'n':>5s} {'single':>12s} {'batch':>12s} {'single/item':>12s} {'batch/item':>12s} {'saved':>8s}")
+    for op, n, single, batch in rows:
+        saved = 1 - batch / single if single else 0.0
+        print(f"  {op:8s} {n:5d} {single:12d} {batch:12d} {single / n:12.0f} {batch / n:12.0f} {saved:8.1%}")
+
+    if save_baseline:
+        print(f"\n📝 Baseline saved to {recorder.save_baseline()}")
+    else:
+        recorder.finish()
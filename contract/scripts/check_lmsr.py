@@ -0,0 +1,46 @@
+from brownie import SwanToken, PredictionMarketNew, AutomatedMarketMaker, accounts
+
+from scripts.lmsr import LMSRQuoter, verify_against_chain
+
+
+def main():
+    owner = accounts[0]
+    user1 = accounts[1]
+    user2 = accounts[2]
+
+    # 1️⃣ 部署与 deploy.py 相同的合约组合
+    print("\n🚀 Deploying swanToken / AMM / PredictionMarket...")
+    betting_token = SwanToken.deploy({'from': owner})
+    amm = AutomatedMarketMaker.deploy({'from': owner})
+    prediction_market = PredictionMarketNew.deploy(betting_token.address, amm.address, {'from': owner})
+
+    mint_amount = 100_000 * 10 ** betting_token.decimals()
+    for user in (owner, user1, user2):
+        betting_token.mint(user, mint_amount, {'from': owner})
+        betting_token.approve(prediction_market.address, mint_amount, {'from': user})
+        betting_token.approve(amm.address, mint_amount, {'from': user})
+
+    tx = prediction_market.createMarket("Will BTC price exceed $100,000?", "Yes", "No", 60 * 60 * 24, {'from': user1})
+    market_id = tx.return_value
+
+    # 2️⃣ 先让市场偏离初始状态，再核对报价
+    prediction_market.buyByShares(market_id, False, 700 * 10 ** 18, {'from': user2})
+
+    sizes = [10 ** 15, 10 ** 18, 10 * 10 ** 18, 100 * 10 ** 18, 1000 * 10 ** 18]
+    result = verify_against_chain(prediction_market, betting_token, market_id, user1, sizes)
+
+    offchain_cost, onchain_cost = result["cost"]
+    print(f"🏦 Market Cost: offline {offchain_cost}, on-chain {onchain_cost}, diff {offchain_cost - onchain_cost}")
+    (pa, pb), (ca, cb) = result["prices"]
+    print(f"💰 Prices: offline ({pa}, {pb}), on-chain ({ca}, {cb}), diff ({pa - ca}, {pb - cb})")
+    worst = 0
+    for shares, quoted, paid in result["buys"]:
+        worst = max(worst, abs(quoted - paid))
+        print(f"🎟️ {shares / 1e18} shares: quoted {quoted}, paid {paid}, diff {quoted - paid}")
+    print(f"\n📊 Max buyByShares quote error: {worst} wei")
+
+    # 3️⃣ 一次批量报价整条深度曲线
+    quoter = LMSRQuoter.from_chain(prediction_market, market_id)
+    grid = [i * 10 ** 18 for i in range(1, 5001)]
+    costs = quoter.quote_shares(True, grid)
+    print(f"📈 Quoted {len(grid)} sizes locally, last cost {costs[-1] / 1e18} tokens")
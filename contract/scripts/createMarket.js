@@ -1,11 +1,13 @@
 const { ethers } = require("hardhat");
+const { manifestAddress } = require("./manifest");
 
 // npx hardhat run scripts/createMarket.js --network kairos
 
 // 地址和其他配置信息
 // const marketOwnerAddress = "0x7aD4eE675f57F29dfb480F6cA5CF0a50c05E0d1e"; // 这里填入市场拥有者地址
 const marketOwnerAddress = process.env.DEPLOYER_ADDRESS;
-const marketContractAddress = process.env.PREDICTION_MARKET_CONTRACT_ADDRESS;
+const marketContractAddress =
+    process.env.PREDICTION_MARKET_CONTRACT_ADDRESS || manifestAddress("PredictionMarketNew");
 
 async function main() {
     // 获取部署的合约
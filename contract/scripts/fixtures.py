@@ -0,0 +1,192 @@
+"""
+场景运行器：一次部署 + 快照，多个场景轮流回滚复用
+
+deploy.py / deploy_amount.py 以前每次都重新部署 SwanToken / AMM / PredictionMarketNew，
+再给 4 个账户铸币、授权，场景本身才开始。这里把这些准备工作做成只执行一次的底座，
+之后（先部署好 Multicall2）chain.snapshot()，每个注册的场景开始前 chain.revert() 回到同一起点，
+并清空共用 SnapshotReader 的缓存。
+合约经部署清单（scripts/manifest.py）部署：在常驻的本地链上，源码没变就直接复用，
+余额和授权已足够的账户也不再铸币 / 授权。
+
+    @scenario("buy_by_shares")
+    def buy_by_shares(fx):
+        market_id = fx.create_market("Will BTC price exceed $100,000?")
+        ...
+        fx.expire()             # 共用的时间跳跃：越过市场到期
+
+    brownie run scripts/fixtures.py main                 # 运行全部场景
+    brownie run scripts/fixtures.py main buy_by_amount   # 只运行指定场景
+    brownie run scripts/fixtures.py main baseline        # 保存 gas-baseline/scenarios.json
+"""
+import time
+import traceback
+from dataclasses import dataclass, field
+
+from brownie import SwanToken, PredictionMarketNew, AutomatedMarketMaker, accounts, chain
+
+from scripts.instrument import Recorder
+from scripts.manifest import Manifest
+from scripts.snapshot import SnapshotReader, ensure_multicall
+
+MARKET_DURATION = 60 * 60 * 24   # 与原脚本一致：市场持续 1 天
+
+SCENARIOS = {}
+
+
+def scenario(name=None):
+    """注册一个场景函数 fn(fx)，返回值会收进运行结果"""
+    def wrap(fn):
+        SCENARIOS[name or fn.__name__] = fn
+        return fn
+    return wrap
+
+
+@dataclass
+class Fixtures:
+    owner: object
+    users: list
+    betting_token: object
+    amm: object
+    prediction_market: object
+    reader: SnapshotReader
+    recorder: Recorder
+    mint_amount: int
+    unit: int = 10 ** 18
+    extra: dict = field(default_factory=dict)
+
+    # --------- 时间跳跃 ---------
+
+    def advance(self, seconds, blocks=2):
+        chain.sleep(seconds)
+        chain.mine(blocks)
+
+    def expire(self, duration=MARKET_DURATION):
+        """越过市场到期时间（createMarket 时传入的 duration）"""
+        self.advance(duration + 1)
+
+    # --------- 常用步骤 ---------
+
+    def create_market(self, question, option_a="Yes", option_b="No", duration=MARKET_DURATION, creator=None):
+        tx = self.prediction_market.createMarket(
+            question, option_a, option_b, duration, {'from': creator or self.users[0]})
+        return tx.return_value
+
+
+def setup_fixtures(recorder, n_users=3, mint_amount=100_000, manifest=None):
+    """部署（或复用）整套合约并为 owner 与 n_users 个用户铸币、授权，只在运行器启动时执行一次"""
+    owner = accounts[0]
+    users = list(accounts[1:n_users + 1])
+    manifest = manifest or Manifest()
+
+    print("\n🚀 Deploying swanToken / AMM / PredictionMarket...")
+    betting_token = manifest.deploy(SwanToken, {'from': owner}, recorder=recorder)
+    amm = manifest.deploy(AutomatedMarketMaker, {'from': owner}, recorder=recorder)
+    prediction_market = manifest.deploy(
+        PredictionMarketNew, betting_token.address, amm.address, {'from': owner}, recorder=recorder)
+
+    unit = 10 ** betting_token.decimals()
+    mint_amount = mint_amount * unit
+    print(f"💰 Funding {len(users)} users and owner with {mint_amount / unit} BTT, approving PredictionMarket & AMM...")
+    for account in users + [owner]:
+        if betting_token.balanceOf(account) < mint_amount:
+            betting_token.mint(account, mint_amount, {'from': owner})
+        for spender in (prediction_market.address, amm.address):
+            if betting_token.allowance(account, spender) < mint_amount:
+                betting_token.approve(spender, mint_amount, {'from': account})
+
+    return Fixtures(
+        owner=owner,
+        users=users,
+        betting_token=betting_token,
+        amm=amm,
+        prediction_market=prediction_market,
+        reader=SnapshotReader(prediction_market, betting_token),
+        recorder=recorder,
+        mint_amount=mint_amount,
+        unit=unit,
+    )
+
+
+@dataclass
+class ScenarioResult:
+    name: str
+    ok: bool
+    seconds: float
+    value: object = None
+    error: str = None
+
+
+class ScenarioRunner:
+    def __init__(self, name="scenarios", n_users=3, mint_amount=100_000):
+        self.recorder = Recorder(name)
+        self.n_users = n_users
+        self.mint_amount = mint_amount
+        self.fixtures = None
+
+    def setup(self):
+        if self.fixtures is None:
+            started = time.perf_counter()
+            self.fixtures = setup_fixtures(self.recorder, self.n_users, self.mint_amount)
+            ensure_multicall(self.fixtures.owner)
+            chain.snapshot()
+            print(f"📸 Fixtures ready in {time.perf_counter() - started:.2f}s, snapshot taken\n")
+        return self.fixtures
+
+    def run(self, names=None, repeat=1):
+        fx = self.setup()
+        names = list(names or SCENARIOS)
+        unknown = [n for n in names if n not in SCENARIOS]
+        if unknown:
+            raise ValueError(f"unknown scenario(s): {', '.join(unknown)}")
+
+        results = []
+        for _ in range(repeat):
+            for name in names:
+                chain.revert()
+                fx.reader.clear()   # 回滚后区块号会被复用，上一个场景的快照不能再用
+                started = time.perf_counter()
+                try:
+                    value = SCENARIOS[name](fx)
+                    results.append(ScenarioResult(name, True, time.perf_counter() - started, value))
+                except Exception:
+                    results.append(ScenarioResult(name, False, time.perf_counter() - started,
+                                                  error=traceback.format_exc()))
+        chain.revert()
+        fx.reader.clear()
+        return results
+
+
+def print_results(results):
+    print("\n🧪 Scenarios:")
+    for r in results:
+        status = "✅" if r.ok else "❌"
+        print(f"  {status} {r.name:24s} {r.seconds:8.2f}s")
+        if r.error:
+            print("    " + r.error.strip().replace("\n", "\n    "))
+    failed = [r for r in results if not r.ok]
+    print(f"\n{len(results) - len(failed)} passed, {len(failed)} failed")
+
+
+def run_scenarios(name, names=None, repeat=1, save_baseline=False):
+    """save_baseline=True 时把本次 gas 汇总写成 gas-baseline/<name>.json，否则与之比较"""
+    runner = ScenarioRunner(name)
+    results = runner.run(names, repeat)
+    print_results(results)
+    if save_baseline:
+        print(f"\n📝 Baseline saved to {runner.recorder.save_baseline()}")
+    else:
+        runner.recorder.finish()
+    return results
+
+
+def main(*names):
+    # 导入即注册
+    import scripts.deploy  # noqa: F401
+    import scripts.deploy_amount  # noqa: F401
+
+    repeat = 1
+    for n in names:
+        if n.startswith("repeat="):
+            repeat = int(n.split("=", 1)[1])
+    selected = [n for n in names if "=" not in n and n != "baseline"] or None
+    return run_scenarios("scenarios", selected, repeat, save_baseline="baseline" in names)
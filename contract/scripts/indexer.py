@@ -0,0 +1,397 @@
+"""
+SupplyChainManager 增量事件索引器
+
+按自适应区块窗口扫描 PhaseSubmitted / PhaseVerified / RewardClaimed / RetailReadySet 日志
+（以及 Merkle 派奖的 MerkleRootPublished / MerkleRewardClaimed），
+写入本地 SQLite：带断点续扫（checkpoint）和重组回滚，按 tokenId / submitter / phase 建索引。
+CID 只存在于 PhaseSubmitted 事件里，这里是唯一能离线查到它的地方。
+
+    brownie run scripts/indexer.py main <SupplyChainManager 地址> durian.db --network kairos
+
+    idx = Indexer(address, "durian.db")
+    idx.sync()
+    idx.provenance(token_id)   # 一次本地查询拿到 5 个阶段的完整履历
+"""
+import sqlite3
+import time
+
+from brownie import SupplyChainManager, web3
+from eth_utils import event_abi_to_log_topic, to_checksum_address
+
+EVENTS = (
+    "PhaseSubmitted", "PhaseVerified", "RewardClaimed", "RetailReadySet",
+    "MerkleRootPublished", "MerkleRewardClaimed",
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoint (
+    contract TEXT PRIMARY KEY,
+    last_block INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS blocks (
+    number INTEGER PRIMARY KEY,
+    hash TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS phase_submitted (
+    token_id TEXT NOT NULL,
+    phase INTEGER NOT NULL,
+    data_hash TEXT NOT NULL,
+    packed_data TEXT NOT NULL,
+    cid TEXT NOT NULL,
+    submitter TEXT NOT NULL,
+    submitted_at INTEGER NOT NULL,
+    block_number INTEGER NOT NULL,
+    tx_hash TEXT NOT NULL,
+    log_index INTEGER NOT NULL,
+    PRIMARY KEY (block_number, log_index)
+);
+CREATE TABLE IF NOT EXISTS phase_verified (
+    token_id TEXT NOT NULL,
+    phase INTEGER NOT NULL,
+    verifier TEXT NOT NULL,
+    verified_at INTEGER NOT NULL,
+    block_number INTEGER NOT NULL,
+    tx_hash TEXT NOT NULL,
+    log_index INTEGER NOT NULL,
+    PRIMARY KEY (block_number, log_index)
+);
+CREATE TABLE IF NOT EXISTS reward_claimed (
+    token_id TEXT NOT NULL,
+    phase INTEGER NOT NULL,
+    recipient TEXT NOT NULL,
+    amount TEXT NOT NULL,
+    block_number INTEGER NOT NULL,
+    tx_hash TEXT NOT NULL,
+    log_index INTEGER NOT NULL,
+    PRIMARY KEY (block_number, log_index)
+);
+CREATE TABLE IF NOT EXISTS retail_ready (
+    token_id TEXT NOT NULL,
+    unlock_time INTEGER NOT NULL,
+    block_number INTEGER NOT NULL,
+    tx_hash TEXT NOT NULL,
+    log_index INTEGER NOT NULL,
+    PRIMARY KEY (block_number, log_index)
+);
+CREATE TABLE IF NOT EXISTS merkle_roots (
+    epoch INTEGER PRIMARY KEY,
+    root TEXT NOT NULL,
+    block_number INTEGER NOT NULL,
+    tx_hash TEXT NOT NULL,
+    log_index INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS merkle_claimed (
+    epoch INTEGER NOT NULL,
+    token_id TEXT NOT NULL,
+    phase INTEGER NOT NULL,
+    recipient TEXT NOT NULL,
+    claim_amount TEXT NOT NULL,     -- 整笔领取的总金额（同一证明下的所有项相同）
+    block_number INTEGER NOT NULL,
+    tx_hash TEXT NOT NULL,
+    log_index INTEGER NOT NULL,
+    item_index INTEGER NOT NULL,
+    PRIMARY KEY (block_number, log_index, item_index)
+);
+-- 非事件表：scripts/merkle.py 发布根成功后写入，记录已发布叶子覆盖的 (tokenId, phase)。
+-- 这些项只能再走 claimMerkle：claimable() 与零售 keeper 都跳过它们，否则下一个 epoch 会重复派发，
+-- 或被 claimReward / claimRewardBatch 抢先领取后使整个叶子 revert。
+CREATE TABLE IF NOT EXISTS merkle_published (
+    token_id TEXT NOT NULL,
+    phase INTEGER NOT NULL,
+    epoch INTEGER NOT NULL,
+    account TEXT NOT NULL,
+    PRIMARY KEY (token_id, phase)
+);
+CREATE INDEX IF NOT EXISTS idx_submitted_token ON phase_submitted (token_id, phase);
+CREATE INDEX IF NOT EXISTS idx_submitted_submitter ON phase_submitted (submitter, phase);
+CREATE INDEX IF NOT EXISTS idx_submitted_phase ON phase_submitted (phase);
+CREATE INDEX IF NOT EXISTS idx_verified_token ON phase_verified (token_id, phase);
+CREATE INDEX IF NOT EXISTS idx_claimed_token ON reward_claimed (token_id, phase);
+CREATE INDEX IF NOT EXISTS idx_claimed_recipient ON reward_claimed (recipient);
+CREATE INDEX IF NOT EXISTS idx_retail_token ON retail_ready (token_id);
+CREATE INDEX IF NOT EXISTS idx_retail_unlock ON retail_ready (unlock_time);
+CREATE INDEX IF NOT EXISTS idx_merkle_token ON merkle_claimed (token_id, phase);
+CREATE INDEX IF NOT EXISTS idx_merkle_recipient ON merkle_claimed (recipient, epoch);
+"""
+
+EVENT_TABLES = ("phase_submitted", "phase_verified", "reward_claimed", "retail_ready", "merkle_roots", "merkle_claimed")
+
+
+def _hex(value):
+    return "0x" + bytes(value).hex()
+
+
+class Indexer:
+    def __init__(
+        self,
+        address,
+        db_path="durian_index.db",
+        start_block=0,
+        confirmations=6,       # 只索引到 head - confirmations
+        min_chunk=10,
+        max_chunk=50_000,
+        reorg_window=256,      # 保留最近多少个已处理区块的哈希用于重组检测
+    ):
+        self.address = to_checksum_address(str(address))
+        self.contract = web3.eth.contract(address=self.address, abi=SupplyChainManager.abi)
+        self.db = sqlite3.connect(db_path)
+        self.db.executescript(SCHEMA)
+        self.start_block = start_block
+        self.confirmations = confirmations
+        self.min_chunk = min_chunk
+        self.max_chunk = max_chunk
+        self.chunk = min(2_000, max_chunk)
+        self.chunk_cap = max_chunk   # 低于最近一次失败的窗口大小，避免放大回节点上限后来回震荡
+        self.reorg_window = reorg_window
+
+        abis = {e["name"]: e for e in SupplyChainManager.abi if e.get("type") == "event"}
+        self._topics = {}
+        for name in EVENTS:
+            topic = _hex(event_abi_to_log_topic(abis[name]))
+            self._topics[topic] = getattr(self.contract.events, name)()
+
+    # --------- 断点 ---------
+
+    @property
+    def last_block(self):
+        row = self.db.execute("SELECT last_block FROM checkpoint WHERE contract = ?", (self.address,)).fetchone()
+        return row[0] if row else self.start_block - 1
+
+    def _set_checkpoint(self, block):
+        self.db.execute(
+            "INSERT INTO checkpoint (contract, last_block) VALUES (?, ?) "
+            "ON CONFLICT(contract) DO UPDATE SET last_block = excluded.last_block",
+            (self.address, block),
+        )
+
+    # --------- 同步 ---------
+
+    def sync(self, to_block=None, progress=True):
+        """从断点扫描到 to_block（默认 head - confirmations），返回新写入的事件数"""
+        head = web3.eth.block_number - self.confirmations if to_block is None else to_block
+        total = 0
+        self._handle_reorg()
+        start = self.last_block + 1
+        while start <= head:
+            end = min(start + self.chunk - 1, head)
+            try:
+                logs = web3.eth.get_logs({
+                    "address": self.address,
+                    "fromBlock": start,
+                    "toBlock": end,
+                    "topics": [list(self._topics)],
+                })
+            except Exception:
+                # 结果过多或超时：记住失败的窗口大小，缩小窗口重试
+                if self.chunk <= self.min_chunk:
+                    raise
+                self.chunk_cap = max(self.min_chunk, min(self.chunk_cap, end - start))
+                self.chunk = max(self.min_chunk, min(self.chunk // 2, self.chunk_cap))
+                continue
+
+            with self.db:
+                for log in logs:
+                    self._store(log)
+                self._remember_blocks(start, end, head)
+                self._set_checkpoint(end)
+            total += len(logs)
+
+            # 日志稀疏时扩大窗口，密集时收缩
+            if len(logs) < 1_000:
+                self.chunk = min(self.chunk_cap, self.chunk * 2)
+            elif len(logs) > 5_000:
+                self.chunk = max(self.min_chunk, self.chunk // 2)
+            if progress:
+                print(f"📦 Indexed blocks {start}..{end} ({len(logs)} logs, next chunk {self.chunk})")
+            start = end + 1
+        return total
+
+    def follow(self, interval=5.0):
+        """持续跟随新区块"""
+        while True:
+            self.sync(progress=False)
+            time.sleep(interval)
+
+    def _remember_blocks(self, start, end, head):
+        """记录 [start, end] 中落在 head 之前 reorg_window 个区块内的每个哈希（远离链头的 chunk 只记末块）"""
+        first = max(start, end - self.reorg_window + 1, head - self.reorg_window + 1)
+        numbers = range(first, end + 1) if first <= end else (end,)
+        self.db.executemany(
+            "INSERT OR REPLACE INTO blocks (number, hash) VALUES (?, ?)",
+            [(n, _hex(web3.eth.get_block(n)["hash"])) for n in numbers],
+        )
+        self.db.execute("DELETE FROM blocks WHERE number <= ?", (end - self.reorg_window,))
+
+    def _handle_reorg(self):
+        """已处理区块的哈希与链上不一致时，回滚到最近的共同祖先"""
+        rows = self.db.execute("SELECT number, hash FROM blocks ORDER BY number DESC").fetchall()
+        if not rows or _hex(web3.eth.get_block(rows[0][0])["hash"]) == rows[0][1]:
+            return
+        # 重组深于记录的窗口：只回退一个窗口，不清空整个索引
+        ancestor = max(self.start_block - 1, self.last_block - self.reorg_window)
+        for number, block_hash in rows[1:]:
+            if _hex(web3.eth.get_block(number)["hash"]) == block_hash:
+                ancestor = number
+                break
+        print(f"⚠️ Reorg detected, rolling back to block {ancestor}")
+        with self.db:
+            self.rollback(ancestor)
+
+    def rollback(self, block):
+        for table in EVENT_TABLES:
+            self.db.execute(f"DELETE FROM {table} WHERE block_number > ?", (block,))
+        self.db.execute("DELETE FROM blocks WHERE number > ?", (block,))
+        self._set_checkpoint(block)
+
+    def _store(self, log):
+        event = self._topics[_hex(log["topics"][0])]
+        decoded = event.processLog(log)
+        args = decoded["args"]
+        name = decoded["event"]
+        pos = (log["blockNumber"], _hex(log["transactionHash"]), log["logIndex"])
+        if name == "PhaseSubmitted":
+            self.db.execute(
+                "INSERT OR REPLACE INTO phase_submitted VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (str(args["tokenId"]), args["phase"], _hex(args["dataHash"]), str(args["packedData"]),
+                 args["cid"], args["submitter"], args["submittedAt"], *pos),
+            )
+        elif name == "PhaseVerified":
+            self.db.execute(
+                "INSERT OR REPLACE INTO phase_verified VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (str(args["tokenId"]), args["phase"], args["verifier"], args["verifiedAt"], *pos),
+            )
+        elif name == "RewardClaimed":
+            self.db.execute(
+                "INSERT OR REPLACE INTO reward_claimed VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (str(args["tokenId"]), args["phase"], args["to"], str(args["amount"]), *pos),
+            )
+        elif name == "RetailReadySet":
+            self.db.execute(
+                "INSERT OR REPLACE INTO retail_ready VALUES (?, ?, ?, ?, ?)",
+                (str(args["tokenId"]), args["unlockTime"], *pos),
+            )
+        elif name == "MerkleRootPublished":
+            self.db.execute(
+                "INSERT OR REPLACE INTO merkle_roots VALUES (?, ?, ?, ?, ?)",
+                (args["epoch"], _hex(args["root"]), *pos),
+            )
+        elif name == "MerkleRewardClaimed":
+            # 一个事件覆盖多个 (tokenId, phase)，逐项展开
+            self.db.executemany(
+                "INSERT OR REPLACE INTO merkle_claimed VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(args["epoch"], str(token_id), phase, args["to"], str(args["amount"]), *pos, i)
+                 for i, (token_id, phase) in enumerate(zip(args["tokenIds"], args["phases"]))],
+            )
+
+    # --------- 查询 ---------
+
+    def provenance(self, token_id):
+        """tokenId 的完整履历：phase => {submitted, verified, claimed, cid, ...}，外加零售解锁时间"""
+        rows = self.db.execute(
+            """
+            SELECT s.phase, s.data_hash, s.packed_data, s.cid, s.submitter, s.submitted_at, s.tx_hash,
+                   v.verifier, v.verified_at, COALESCE(c.recipient, m.recipient), c.amount, m.epoch
+            FROM phase_submitted s
+            LEFT JOIN phase_verified v ON v.token_id = s.token_id AND v.phase = s.phase
+            LEFT JOIN reward_claimed c ON c.token_id = s.token_id AND c.phase = s.phase
+            LEFT JOIN merkle_claimed m ON m.token_id = s.token_id AND m.phase = s.phase
+            WHERE s.token_id = ?
+            ORDER BY s.phase
+            """,
+            (str(token_id),),
+        ).fetchall()
+        phases = {}
+        for (phase, data_hash, packed, cid, submitter, submitted_at, tx_hash,
+             verifier, verified_at, recipient, amount, merkle_epoch) in rows:
+            phases[phase] = {
+                "phase": phase,
+                "dataHash": data_hash,
+                "packedData": int(packed),
+                "cid": cid,
+                "submitter": submitter,
+                "submittedAt": submitted_at,
+                "txHash": tx_hash,
+                # phase 1 与 phase 5 在提交时自动验证，不发 PhaseVerified 事件
+                "verified": verifier is not None or phase in (1, 5),
+                "verifier": verifier,
+                "verifiedAt": verified_at,
+                "claimed": recipient is not None,
+                "claimedAmount": int(amount) if amount is not None else 0,
+                "merkleEpoch": merkle_epoch,   # 经 Merkle 派奖领取时的 epoch（金额计在整笔领取里）
+            }
+        unlock = self.db.execute(
+            "SELECT unlock_time FROM retail_ready WHERE token_id = ? ORDER BY block_number DESC LIMIT 1",
+            (str(token_id),),
+        ).fetchone()
+        return {"tokenId": str(token_id), "phases": phases, "retailReadyAt": unlock[0] if unlock else 0}
+
+    def by_submitter(self, submitter, phase=None):
+        sql = "SELECT token_id, phase, cid, submitted_at FROM phase_submitted WHERE submitter = ?"
+        params = [submitter]
+        if phase is not None:
+            sql += " AND phase = ?"
+            params.append(phase)
+        return self.db.execute(sql + " ORDER BY block_number, log_index", params).fetchall()
+
+    def by_phase(self, phase):
+        return self.db.execute(
+            "SELECT token_id, submitter, cid, submitted_at FROM phase_submitted WHERE phase = ? "
+            "ORDER BY block_number, log_index",
+            (phase,),
+        ).fetchall()
+
+    def claimable(self, now, submitter=None):
+        """
+        已验证、未领取（单笔与 Merkle 两种方式都算）、零售时间锁已到期、且不在已发布叶子里的
+        (token_id, phase, submitter)。供 scripts/merkle.py 生成派奖树。
+        """
+        sql = """
+            SELECT s.token_id, s.phase, s.submitter
+            FROM phase_submitted s
+            LEFT JOIN phase_verified v ON v.token_id = s.token_id AND v.phase = s.phase
+            LEFT JOIN retail_ready r ON r.token_id = s.token_id AND s.phase = 5
+            WHERE (s.phase IN (1, 5) OR v.token_id IS NOT NULL)
+              AND (s.phase != 5 OR r.unlock_time <= ?)
+              AND NOT EXISTS (SELECT 1 FROM reward_claimed c WHERE c.token_id = s.token_id AND c.phase = s.phase)
+              AND NOT EXISTS (SELECT 1 FROM merkle_claimed m WHERE m.token_id = s.token_id AND m.phase = s.phase)
+              AND NOT EXISTS (SELECT 1 FROM merkle_published p WHERE p.token_id = s.token_id AND p.phase = s.phase)
+        """
+        params = [now]
+        if submitter is not None:
+            sql += " AND s.submitter = ?"
+            params.append(submitter)
+        rows = self.db.execute(sql + " ORDER BY s.submitter, s.block_number, s.log_index", params).fetchall()
+        return [(int(token_id), phase, who) for token_id, phase, who in rows]
+
+    def record_published(self, epoch, claims):
+        """登记一个已上链 epoch 的全部叶子项；claims: {account: Claim}"""
+        with self.db:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO merkle_published VALUES (?, ?, ?, ?)",
+                [(str(token_id), phase, epoch, account)
+                 for account, c in claims.items()
+                 for token_id, phase in zip(c.tokenIds, c.phases)],
+            )
+
+    def published(self, token_ids, phase):
+        """token_ids 中该 phase 已进入某个已发布叶子的 tokenId 集合"""
+        token_ids = [str(t) for t in token_ids]
+        if not token_ids:
+            return set()
+        rows = self.db.execute(
+            f"SELECT token_id FROM merkle_published WHERE phase = ? AND token_id IN ({','.join('?' * len(token_ids))})",
+            [phase, *token_ids],
+        ).fetchall()
+        return {int(t) for (t,) in rows}
+
+    def close(self):
+        self.db.close()
+
+
+def main(address, db_path="durian_index.db", start_block=0, follow=False):
+    idx = Indexer(address, db_path, start_block=int(start_block))
+    print(f"🔎 Indexing {idx.address} from block {idx.last_block + 1} into {db_path}")
+    count = idx.sync()
+    print(f"✅ {count} new events, checkpoint at block {idx.last_block}")
+    if follow:
+        idx.follow()
@@ -0,0 +1,304 @@
+"""
+阶段数据批量导入：规范化 JSON → dataHash / packedData → submitPhaseBatch
+
+流式读取农场 / 包装厂导出的 CSV 或 JSONL（每行一条记录，至少含 tokenId、phase，可选 cid），
+在多个工作进程里规范化并计算 keccak256、按声明的位布局打包数值字段，
+再按固定大小的批次提交。输入按窗口分段送进进程池，内存占用与文件大小无关。
+
+位布局与前端各提交页一致（值 = floor(字段 × scale)）：
+
+    phase 1  avgTemp×100 << 176 | avgHumidity×100 << 96 | area×100
+    phase 2  brix×10 << 176 | avgWeightKg×100 << 96
+    phase 3  avgBoxWeightKg×100 << 176 | coldChain(0/1)
+    phase 4  avgTransitTempC×100 << 176 | coldChainBreaches
+    phase 5  avgStoreTempC×100 << 176 | unitsSold << 96 | pricePerKg×100
+
+温度字段按所在位段宽度的补码存负数（前端对负数没有定义，正数结果相同）。
+
+无法解析或打包的行（坏 JSON、缺字段、未知 phase、数值越界）写入 <输入文件>.rejects.jsonl 后继续；
+同一批次里重复的 (tokenId, phase) 只提交第一条，其余同样记入拒绝文件，避免整批 revert。
+每批发送前先用 eth_call 预演，会 revert 的行（token 不存在、发送者没有该 phase 的角色等）二分找出后
+同样记入拒绝文件，其余照常提交；dry 模式也会预演，可提前看到哪些行会失败。
+
+    brownie run scripts/ingest.py main farms.jsonl <SupplyChainManager 地址> --network kairos
+    brownie run scripts/ingest.py main packers.csv <地址> 500 dry
+"""
+import csv
+import json
+import math
+import multiprocessing as mp
+from dataclasses import dataclass
+from itertools import islice
+
+from eth_utils import keccak
+
+META_FIELDS = ("tokenId", "cid")   # 不参与 dataHash 的字段
+
+
+@dataclass(frozen=True)
+class Field:
+    name: str
+    offset: int
+    bits: int
+    scale: int = 1
+    signed: bool = False
+
+
+SCHEMAS = {
+    1: (Field("avgTemp", 176, 80, 100, True), Field("avgHumidity", 96, 80, 100), Field("area", 0, 96, 100)),
+    2: (Field("brix", 176, 80, 10), Field("avgWeightKg", 96, 80, 100)),
+    3: (Field("avgBoxWeightKg", 176, 80, 100), Field("coldChain", 0, 96)),
+    4: (Field("avgTransitTempC", 176, 80, 100, True), Field("coldChainBreaches", 0, 96)),
+    5: (Field("avgStoreTempC", 176, 80, 100, True), Field("unitsSold", 96, 80), Field("pricePerKg", 0, 96, 100)),
+}
+
+
+def _number(value):
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, str):
+        value = value.strip().lower()
+        if value in ("true", "false"):
+            return int(value == "true")
+        return float(value) if value else 0
+    return value or 0
+
+
+def pack(phase, record):
+    packed = 0
+    for f in SCHEMAS[phase]:
+        # 与前端 Math.floor(Number(x) * scale) 保持同样的浮点运算
+        value = math.floor(_number(record.get(f.name, 0)) * f.scale)
+        if f.signed:
+            if not -(1 << (f.bits - 1)) <= value < (1 << (f.bits - 1)):
+                raise ValueError(f"{f.name}={value} does not fit in {f.bits} signed bits")
+            value &= (1 << f.bits) - 1
+        elif not 0 <= value < (1 << f.bits):
+            raise ValueError(f"{f.name}={value} does not fit in {f.bits} bits")
+        packed |= value << f.offset
+    return packed
+
+
+def unpack(phase, packed):
+    """pack 的逆运算，返回按 scale 还原后的数值"""
+    values = {}
+    for f in SCHEMAS[phase]:
+        value = (packed >> f.offset) & ((1 << f.bits) - 1)
+        if f.signed and value >> (f.bits - 1):
+            value -= 1 << f.bits
+        values[f.name] = value / f.scale if f.scale != 1 else value
+    return values
+
+
+def canonical_json(record):
+    payload = {k: v for k, v in record.items() if k not in META_FIELDS}
+    return json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+def data_hash(record):
+    return keccak(text=canonical_json(record))
+
+
+# --------- 读取 ---------
+
+def _canonical_numbers(record):
+    """
+    tokenId / phase 与位布局里的数值字段统一成数字：整数值一律用 int，其余用 float。
+    CSV 的 "29"、"29.0" 与 JSONL 的 29、29.0、"29" 因此得到同一个 canonical JSON 与 dataHash。
+    """
+    record["tokenId"] = int(record["tokenId"])
+    record["phase"] = int(record["phase"])
+    for f in SCHEMAS.get(record["phase"], ()):
+        if f.name in record:
+            number = _number(record[f.name])
+            record[f.name] = int(number) if float(number).is_integer() else number
+    return record
+
+
+def _coerce_csv(row):
+    """CSV 只有字符串：数值字段按 _canonical_numbers 转换，其余保持字符串"""
+    return _canonical_numbers({k: v for k, v in row.items() if v is not None})
+
+
+def iter_records(path):
+    """逐行产出 (行号, 原始行)，不把整个文件读进内存；解析放到工作进程里（见 parse）"""
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.endswith(".csv"):
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield reader.line_num, row
+        else:
+            for lineno, line in enumerate(f, 1):
+                if line.strip():
+                    yield lineno, line
+
+
+def parse(raw):
+    """CSV 行（dict）或 JSONL 行（str）→ 记录"""
+    if isinstance(raw, dict):
+        return _coerce_csv(raw)
+    record = json.loads(raw)
+    if not isinstance(record, dict):
+        raise ValueError("record is not a JSON object")
+    return _canonical_numbers(record)
+
+
+# --------- 处理与提交 ---------
+
+def prepare(record):
+    """返回 submitPhaseBatch 的一项 (tokenId, phase, dataHash, packedData, cid)"""
+    phase = int(record["phase"])
+    if phase not in SCHEMAS:
+        raise ValueError(f"bad phase {phase} for token {record.get('tokenId')}")
+    return int(record["tokenId"]), phase, data_hash(record), pack(phase, record), str(record.get("cid", ""))
+
+
+def _prepare_line(line):
+    """工作进程里执行：(行号, 原始行) → (行号, 项, None) 或 (行号, 原始行, 错误)；坏行不抛出，不中断进程池"""
+    lineno, raw = line
+    try:
+        return lineno, prepare(parse(raw)), None
+    except (ValueError, KeyError, TypeError, OverflowError) as e:
+        return lineno, raw, f"{type(e).__name__}: {e}"
+
+
+def prepared(records, workers=None, window=20_000, chunksize=256):
+    """
+    分窗口送进进程池：Pool.imap 会一次性吃掉整个输入迭代器，
+    所以每次只给它 window 条，保证内存上限。
+    """
+    with mp.Pool(workers) as pool:
+        while True:
+            chunk = list(islice(records, window))
+            if not chunk:
+                return
+            yield from pool.imap(_prepare_line, chunk, chunksize)
+
+
+def _batches(items, size):
+    while True:
+        batch = list(islice(items, size))
+        if not batch:
+            return
+        yield batch
+
+
+class Rejects:
+    """拒绝文件：每行 {"line", "error", "record"}，首次写入时才创建"""
+
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+        self._file = None
+
+    def add(self, lineno, raw, error):
+        if self._file is None:
+            self._file = open(self.path, "w", encoding="utf-8")
+        record = raw.rstrip("\n") if isinstance(raw, str) else raw
+        self._file.write(json.dumps({"line": lineno, "error": error, "record": record}, ensure_ascii=False) + "\n")
+        self.count += 1
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+
+
+def _item_record(item):
+    return {"tokenId": item[0], "phase": item[1], "cid": item[4]}
+
+
+def _dedupe(batch, rejects):
+    """同一批次内相同 (tokenId, phase) 只保留第一条：合约会因 "already submitted" 让整批 revert"""
+    seen = {}
+    unique = []
+    for lineno, item in batch:
+        key = item[:2]
+        if key in seen:
+            rejects.add(lineno, _item_record(item), f"duplicate (tokenId, phase), first seen on line {seen[key]}")
+            continue
+        seen[key] = lineno
+        unique.append((lineno, item))
+    return unique
+
+
+def _drop_submitted(manager, batch):
+    """跳过链上已提交的项，重跑同一个文件时可以从断点继续"""
+    token_ids = [item[0] for _, item in batch]
+    flags = dict(zip(token_ids, manager.getFlagsBatch(token_ids)))
+    return [(lineno, item) for lineno, item in batch if not flags[item[0]] & (1 << (item[1] - 1))]
+
+
+def _preflight(manager, batch, sender):
+    """
+    eth_call 预演 submitPhaseBatch；整批会 revert 时二分找出坏项（token 不存在、sender 没有该 phase 的角色等），
+    返回 (可提交, [(行号, 项, 错误)])。同一批次里的项互不依赖，拆开预演的结果与整批一致。
+    """
+    try:
+        manager.submitPhaseBatch.call(*map(list, zip(*(item for _, item in batch))), {'from': sender})
+        return batch, []
+    except Exception as e:
+        if len(batch) == 1:
+            lineno, item = batch[0]
+            return [], [(lineno, item, repr(e))]
+    mid = len(batch) // 2
+    ok_left, bad_left = _preflight(manager, batch[:mid], sender)
+    ok_right, bad_right = _preflight(manager, batch[mid:], sender)
+    return ok_left + ok_right, bad_left + bad_right
+
+
+def _accepted(results, rejects):
+    for lineno, item, error in results:
+        if error is None:
+            yield lineno, item
+        else:
+            rejects.add(lineno, item, error)
+
+
+def ingest(path, manager, sender, batch_size=200, workers=None, dry_run=False, recorder=None, rejects_path=None):
+    stats = {"records": 0, "submitted": 0, "skipped": 0, "rejected": 0, "transactions": 0, "gas": 0}
+    rejects = Rejects(rejects_path or f"{path}.rejects.jsonl")
+    try:
+        for batch in _batches(_accepted(prepared(iter_records(path), workers), rejects), batch_size):
+            stats["records"] += len(batch)
+            unique = _dedupe(batch, rejects)
+            todo = _drop_submitted(manager, unique) if unique else []
+            stats["skipped"] += len(unique) - len(todo)
+            if todo:
+                todo, bad = _preflight(manager, todo, sender)
+                for lineno, item, error in bad:
+                    rejects.add(lineno, _item_record(item), f"submitPhaseBatch would revert: {error}")
+            stats["rejected"] = rejects.count
+            if not todo or dry_run:
+                continue
+            tx = manager.submitPhaseBatch(*map(list, zip(*(item for _, item in todo))), {'from': sender})
+            if recorder:
+                recorder.add_receipt(f"submitPhaseBatch[{len(todo)}]", tx, 0.0)
+            stats["submitted"] += len(todo)
+            stats["transactions"] += 1
+            stats["gas"] += tx.gas_used
+            print(f"📤 {stats['records']} records read, {stats['submitted']} submitted in {stats['transactions']} tx")
+    finally:
+        rejects.close()
+    stats["rejected"] = rejects.count
+    stats["rejects_path"] = rejects.path if rejects.count else None
+    return stats
+
+
+def main(path, address, batch_size=200, *flags):
+    # brownie 只在主进程里导入：工作进程只做哈希与打包
+    from brownie import SupplyChainManager, accounts
+
+    from scripts.instrument import Recorder
+
+    manager = SupplyChainManager.at(address)
+    recorder = Recorder("ingest")
+    dry_run = "dry" in flags
+    stats = ingest(path, manager, accounts[0], int(batch_size), dry_run=dry_run, recorder=recorder)
+    mode = " (dry run)" if dry_run else ""
+    print(f"✅ {stats['records']} records, {stats['submitted']} submitted, {stats['skipped']} already on chain{mode}")
+    if stats["rejected"]:
+        print(f"⚠️ {stats['rejected']} rows rejected, see {stats['rejects_path']}")
+    if stats["transactions"]:
+        print(f"⛽ {stats['gas']} gas, {stats['gas'] / stats['submitted']:.0f} per record")
+        recorder.finish()
+    return stats
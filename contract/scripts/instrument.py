@@ -0,0 +1,212 @@
+"""
+合约交互的 gas / 延迟埋点
+
+把脚本里用到的合约对象包一层，每次发交易都会记录 gas、calldata 大小、
+提交到拿到回执的耗时以及触发的事件；按方法汇总出分位数，写成 JSON，
+并与已提交的基线对比，标出 gas 回归。
+
+    recorder = Recorder("deploy")
+    prediction_market = deploy(recorder, PredictionMarketNew, token, amm, {'from': owner})
+    ...
+    recorder.finish()   # 写 reports/gas/deploy.json，与 gas-baseline/deploy.json 比较
+
+基线由 `brownie run scripts/deploy.py main baseline`（或 deploy_amount.py / fixtures.py）生成，
+生成后提交 gas-baseline/ 下的 JSON。revert 的交易同样记录（status=0），计入 failed，不计入 gas 分位数。
+"""
+import json
+import os
+import time
+from collections import defaultdict
+
+import numpy as np
+from brownie import chain
+from brownie.exceptions import VirtualMachineError
+from brownie.network.transaction import TransactionReceipt
+
+REPORT_DIR = os.path.join("reports", "gas")
+BASELINE_DIR = "gas-baseline"
+PERCENTILES = (50, 90, 95, 99)
+
+
+def _calldata_size(data):
+    if not data:
+        return 0
+    if isinstance(data, (bytes, bytearray)):
+        return len(data)
+    data = data[2:] if data.startswith("0x") else data
+    return len(data) // 2
+
+
+class Recorder:
+    def __init__(self, name):
+        self.name = name
+        self.records = []
+
+    def add(self, method, gas_used, calldata_size, latency, events=None, status=1):
+        self.records.append({
+            "method": method,
+            "gas_used": int(gas_used),
+            "calldata_size": int(calldata_size),
+            "latency": float(latency),
+            "events": events or {},
+            "status": int(status),
+        })
+
+    def add_receipt(self, method, tx, latency):
+        """记录一个 brownie TransactionReceipt"""
+        events = {name: len(tx.events[name]) for name in tx.events.keys()} if tx.events else {}
+        self.add(method, tx.gas_used, _calldata_size(tx.input), latency, events, tx.status)
+
+    def add_results(self, results):
+        """记录 TxEngine 返回的一批 TxResult"""
+        for r in results:
+            if r.receipt is None:
+                continue
+            self.add(r.tx.label, r.receipt["gasUsed"], _calldata_size(r.tx.data), r.latency,
+                     {"logs": len(r.receipt["logs"])}, r.receipt["status"])
+        return results
+
+    # --------- 汇总 ---------
+
+    def aggregate(self):
+        by_method = defaultdict(list)
+        for rec in self.records:
+            by_method[rec["method"]].append(rec)
+        summary = {}
+        for method, recs in sorted(by_method.items()):
+            # 分位数只看成功的交易；全部失败时退回全部记录
+            ok = [r for r in recs if r["status"] == 1] or recs
+            gas = np.asarray([r["gas_used"] for r in ok])
+            latency = np.asarray([r["latency"] for r in recs])
+            events = defaultdict(int)
+            for r in recs:
+                for name, count in r["events"].items():
+                    events[name] += count
+            summary[method] = {
+                "count": len(recs),
+                "failed": sum(1 for r in recs if r["status"] != 1),
+                "calldata_mean": float(np.mean([r["calldata_size"] for r in recs])),
+                "gas": {"mean": float(gas.mean()), "max": int(gas.max()),
+                        **{f"p{p}": float(np.percentile(gas, p)) for p in PERCENTILES}},
+                "latency": {"mean": float(latency.mean()),
+                            **{f"p{p}": float(np.percentile(latency, p)) for p in PERCENTILES}},
+                "events": dict(events),
+            }
+        return summary
+
+    def write(self, path=None):
+        path = path or os.path.join(REPORT_DIR, f"{self.name}.json")
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            json.dump({"name": self.name, "methods": self.aggregate()}, f, indent=2, sort_keys=True)
+        return path
+
+    def save_baseline(self):
+        return self.write(os.path.join(BASELINE_DIR, f"{self.name}.json"))
+
+    def finish(self, tolerance=0.02):
+        """写出报告；若存在基线则比较并打印回归"""
+        path = self.write()
+        print(f"\n📝 Gas report written to {path}")
+        baseline = os.path.join(BASELINE_DIR, f"{self.name}.json")
+        if not os.path.exists(baseline):
+            print(f"ℹ️ No baseline at {baseline}; rerun the script with `baseline` to create one")
+            return []
+        regressions = compare(self.aggregate(), load_summary(baseline), tolerance)
+        print_comparison(regressions)
+        return regressions
+
+
+def load_summary(path):
+    with open(path) as f:
+        return json.load(f)["methods"]
+
+
+def compare(current, baseline, tolerance=0.02, metric="p50"):
+    """返回 [(method, baseline_gas, current_gas, 变化比例, 是否回归)]，回归指 gas 增幅超过 tolerance"""
+    rows = []
+    for method in sorted(set(current) | set(baseline)):
+        if method not in current or method not in baseline:
+            continue
+        old = baseline[method]["gas"][metric]
+        new = current[method]["gas"][metric]
+        change = (new - old) / old if old else 0.0
+        rows.append((method, old, new, change, change > tolerance))
+    return rows
+
+
+def print_comparison(rows):
+    print("\n⛽ Gas vs baseline (p50):")
+    for method, old, new, change, regressed in rows:
+        flag = "❌ REGRESSION" if regressed else "✅"
+        print(f"  {method:20s} {old:10.0f} -> {new:10.0f} ({change:+.2%}) {flag}")
+    regressed = [r for r in rows if r[4]]
+    if regressed:
+        print(f"\n❌ {len(regressed)} method(s) got more expensive")
+
+
+# --------- 合约代理 ---------
+
+class _InstrumentedMethod:
+    def __init__(self, method, name, recorder):
+        self._method = method
+        self._name = name
+        self._recorder = recorder
+
+    def __call__(self, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            result = self._method(*args, **kwargs)
+        except VirtualMachineError as e:
+            self._record_revert(e, args, time.perf_counter() - started)
+            raise
+        # 用 type() 判断，不触碰 multicall 的惰性结果代理
+        if type(result) is TransactionReceipt:
+            self._recorder.add_receipt(self._name, result, time.perf_counter() - started)
+        return result
+
+    def _record_revert(self, exc, args, latency):
+        txid = getattr(exc, "txid", None)
+        if txid:
+            # 已上链但 revert：按回执记录实际消耗的 gas
+            self._recorder.add_receipt(self._name, chain.get_transaction(txid), latency)
+            return
+        # 估算 gas 时就 revert，交易没有广播
+        try:
+            calldata = _calldata_size(self._method.encode_input(*args))
+        except Exception:
+            calldata = 0
+        self._recorder.add(self._name, 0, calldata, latency, status=0)
+
+    def __getattr__(self, name):
+        # encode_input / call / estimate_gas 等照常可用
+        return getattr(self._method, name)
+
+
+class InstrumentedContract:
+    """转发所有属性；方法调用返回交易回执时记录埋点，只读调用原样返回"""
+
+    def __init__(self, contract, recorder):
+        self._contract = contract
+        self._recorder = recorder
+
+    def __getattr__(self, name):
+        attr = getattr(self._contract, name)
+        if not callable(attr):
+            return attr
+        return _InstrumentedMethod(attr, name, self._recorder)
+
+    def __repr__(self):
+        return f"<Instrumented {self._contract!r}>"
+
+
+def instrument(contract, recorder):
+    return InstrumentedContract(contract, recorder)
+
+
+def deploy(recorder, container, *args):
+    """部署合约并记录部署交易，返回已包装的合约"""
+    started = time.perf_counter()
+    contract = container.deploy(*args)
+    recorder.add_receipt(f"deploy:{container._name}", contract.tx, time.perf_counter() - started)
+    return InstrumentedContract(contract, recorder)
@@ -0,0 +1,264 @@
+"""
+零售时间锁 keeper：到点自动批量领取 phase 5 奖励
+
+从索引器（RetailReadySet 事件）得到每个 token 的解锁时间，放进按时间排序的小顶堆；
+到期后按提交者分组，用 claimRewardBatch 批量领取，并按令牌桶限速。
+claimReward 只能由提交者本人调用，所以 keeper 只处理自己持有私钥的零售账户。
+
+已发送的领取记录在索引库的 keeper_sent 表里，重启后不会重复发送；已发布进 Merkle 叶子的 token
+（merkle_published 表）留给 claimMerkle，keeper 不再领取；
+堆本身随时可从索引库重建（未领取的 retail_ready 行）。
+
+发送前先用 eth_call 预演整批，会 revert 时二分找出坏项（不是提交者、已被领取、合约余额不足等），
+只发送能成功的部分，预演不花 gas。坏项按指数退避重试，失败 max_attempts 次后挂起到 keeper_parked 表，
+不再进入队列。
+
+    brownie run scripts/keeper.py main <SupplyChainManager 地址> durian.db --network kairos
+    brownie run scripts/keeper.py main <地址> durian.db dry --network kairos
+    brownie run scripts/keeper.py demo          # 本地链：提交 phase 5 → chain.sleep → keeper 领取
+"""
+import heapq
+import time
+
+from brownie import SupplyChainManager, accounts, chain, web3
+
+from scripts.indexer import Indexer
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS keeper_sent (
+    token_id TEXT PRIMARY KEY,
+    submitter TEXT NOT NULL,
+    tx_hash TEXT,
+    sent_at INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS keeper_parked (
+    token_id TEXT PRIMARY KEY,
+    submitter TEXT NOT NULL,
+    attempts INTEGER NOT NULL,
+    error TEXT,
+    parked_at INTEGER NOT NULL
+);
+"""
+
+RETAIL_CLAIMED_BIT = 1 << (16 + 4)   # getFlags：phase 5 的 claimed 位
+
+
+class RateLimiter:
+    """令牌桶：平均 rate 笔/秒，最多连发 burst 笔"""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def acquire(self):
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            time.sleep((1 - self.tokens) / self.rate)
+
+
+class RetailKeeper:
+    def __init__(
+        self,
+        manager,
+        index,
+        signers=(),            # 可发送交易的零售账户；dry_run 时可为空，按全部提交者规划
+        batch_size=200,
+        rate=1.0,              # 每秒最多发几笔
+        burst=5,
+        dry_run=False,
+        max_attempts=5,        # 同一 token 失败多少次后挂起
+        backoff=60,            # 首次失败后的重试间隔（秒，链上时间），之后每次翻倍
+    ):
+        self.manager = manager
+        self.index = index
+        self.signers = {str(a.address): a for a in signers}
+        self.batch_size = batch_size
+        self.limiter = RateLimiter(rate, burst)
+        self.dry_run = dry_run
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.index.db.executescript(SCHEMA)
+        self.heap = []
+        self._queued = set()
+        self._attempts = {}     # tokenId -> 已失败次数
+        self._seen_block = -1
+
+    # --------- 队列 ---------
+
+    def refresh(self):
+        """同步索引器，把新出现的解锁时间压入堆"""
+        self.index.sync(progress=False)
+        rows = self.index.db.execute(
+            """
+            SELECT r.token_id, r.unlock_time, s.submitter, r.block_number
+            FROM retail_ready r
+            JOIN phase_submitted s ON s.token_id = r.token_id AND s.phase = 5
+            WHERE r.block_number > ?
+              AND NOT EXISTS (SELECT 1 FROM reward_claimed c WHERE c.token_id = r.token_id AND c.phase = 5)
+              AND NOT EXISTS (SELECT 1 FROM merkle_claimed m WHERE m.token_id = r.token_id AND m.phase = 5)
+              AND NOT EXISTS (SELECT 1 FROM merkle_published p WHERE p.token_id = r.token_id AND p.phase = 5)
+              AND NOT EXISTS (SELECT 1 FROM keeper_sent k WHERE k.token_id = r.token_id)
+              AND NOT EXISTS (SELECT 1 FROM keeper_parked p WHERE p.token_id = r.token_id)
+            """,
+            (self._seen_block,),
+        ).fetchall()
+        for token_id, unlock, submitter, block in rows:
+            self._seen_block = max(self._seen_block, block)
+            if token_id in self._queued or (self.signers and submitter not in self.signers):
+                continue
+            heapq.heappush(self.heap, (unlock, int(token_id), submitter))
+            self._queued.add(token_id)
+        return len(rows)
+
+    def due(self, now):
+        """弹出所有已解锁的项，按提交者分组"""
+        groups = {}
+        while self.heap and self.heap[0][0] <= now:
+            _, token_id, submitter = heapq.heappop(self.heap)
+            self._queued.discard(str(token_id))
+            groups.setdefault(submitter, []).append(token_id)
+        return groups
+
+    @property
+    def next_unlock(self):
+        return self.heap[0][0] if self.heap else None
+
+    # --------- 发送 ---------
+
+    def _unclaimed(self, token_ids):
+        # 入堆之后才被发布进 Merkle 叶子的项留给 claimMerkle，抢先领取会让整个叶子 revert
+        published = self.index.published(token_ids, 5)
+        token_ids = [t for t in token_ids if t not in published]
+        if not token_ids:
+            return []
+        flags = self.manager.getFlagsBatch(token_ids)
+        return [t for t, f in zip(token_ids, flags) if not f & RETAIL_CLAIMED_BIT]
+
+    def _record(self, token_ids, submitter, tx_hash):
+        with self.index.db:
+            self.index.db.executemany(
+                "INSERT OR REPLACE INTO keeper_sent VALUES (?, ?, ?, ?)",
+                [(str(t), submitter, tx_hash, int(time.time())) for t in token_ids],
+            )
+
+    def _preflight(self, batch, sender):
+        """eth_call 预演；整批会 revert 时二分，返回 (可领取, [(tokenId, 错误)])"""
+        try:
+            self.manager.claimRewardBatch.call(batch, [5] * len(batch), {'from': sender})
+            return batch, []
+        except Exception as e:
+            if len(batch) == 1:
+                return [], [(batch[0], repr(e))]
+        mid = len(batch) // 2
+        ok_left, bad_left = self._preflight(batch[:mid], sender)
+        ok_right, bad_right = self._preflight(batch[mid:], sender)
+        return ok_left + ok_right, bad_left + bad_right
+
+    def _failed(self, token_id, submitter, error, now):
+        """记一次失败：退避后放回队列，达到 max_attempts 次则挂起"""
+        attempts = self._attempts.get(token_id, 0) + 1
+        if attempts >= self.max_attempts:
+            self._attempts.pop(token_id, None)
+            if self.dry_run:
+                print(f"🧪 [dry run] {submitter}: token {token_id} would be parked: {error}")
+                return
+            with self.index.db:
+                self.index.db.execute(
+                    "INSERT OR REPLACE INTO keeper_parked VALUES (?, ?, ?, ?, ?)",
+                    (str(token_id), submitter, attempts, error, int(time.time())),
+                )
+            print(f"🅿️ {submitter}: token {token_id} parked after {attempts} failed attempts: {error}")
+            return
+        self._attempts[token_id] = attempts
+        heapq.heappush(self.heap, (now + self.backoff * 2 ** (attempts - 1), token_id, submitter))
+        self._queued.add(str(token_id))
+
+    def claim(self, groups, now=None):
+        """按批发送 claimRewardBatch，返回 [(submitter, tokenIds, tx 或 None)]"""
+        now = now if now is not None else chain.time()
+        sent = []
+        for submitter, token_ids in groups.items():
+            sender = self.signers.get(submitter, submitter)
+            for i in range(0, len(token_ids), self.batch_size):
+                batch = self._unclaimed(token_ids[i:i + self.batch_size])
+                if not batch:
+                    continue
+                batch, bad = self._preflight(batch, sender)
+                for token_id, error in bad:
+                    self._failed(token_id, submitter, error, now)
+                if not batch:
+                    continue
+                if self.dry_run:
+                    print(f"🧪 [dry run] {submitter}: would claim {len(batch)} retail rewards, {len(bad)} would fail")
+                    sent.append((submitter, batch, None))
+                    continue
+                self.limiter.acquire()
+                try:
+                    tx = self.manager.claimRewardBatch(batch, [5] * len(batch), {'from': sender})
+                except Exception as e:
+                    # 预演通过但上链失败（状态在两者之间变了）：整批计一次失败，退避后重试
+                    print(f"⚠️ {submitter}: claim of {len(batch)} failed: {e!r}")
+                    for token_id in batch:
+                        self._failed(token_id, submitter, repr(e), now)
+                    continue
+                for token_id in batch:
+                    self._attempts.pop(token_id, None)
+                self._record(batch, submitter, tx.txid)
+                print(f"💰 {submitter}: claimed {len(batch)} retail rewards in {tx.txid}")
+                sent.append((submitter, batch, tx))
+        return sent
+
+    def run_once(self, now=None):
+        self.refresh()
+        now = now if now is not None else chain.time()
+        return self.claim(self.due(now), now)
+
+    def run(self, interval=15.0):
+        """常驻：每 interval 秒增量同步一次事件，下一个解锁更早时提前醒来；不逐个轮询 token"""
+        while True:
+            self.run_once()
+            wait = interval
+            if self.next_unlock is not None:
+                wait = min(interval, max(self.next_unlock - chain.time(), 1))
+            time.sleep(wait)
+
+
+def main(address, db_path="durian_index.db", *flags):
+    manager = SupplyChainManager.at(address)
+    index = Indexer(address, db_path)
+    dry_run = "dry" in flags
+    keeper = RetailKeeper(manager, index, signers=[] if dry_run else list(accounts), dry_run=dry_run)
+    print(f"⏰ Retail keeper for {manager.address}{' (dry run)' if dry_run else ''}")
+    keeper.run()
+
+
+def demo(n_tokens=50, db_path="keeper_demo.db"):
+    """本地链演示：提交 n 个 phase 5，时间旅行越过锁定期，由 keeper 一次领取"""
+    from scripts.bench_supply_chain import _submit_batch
+    from scripts.supply_chain import deploy_stack, fund_rewards, grant_roles, mint_durians
+
+    owner = accounts[0]
+    reward_token, nft, manager = deploy_stack(owner)
+    grant_roles(nft, manager, owner)
+    n_tokens = int(n_tokens)
+    mint_durians(nft, owner, range(1, n_tokens + 1))
+    fund_rewards(reward_token, manager, owner, 10 * 10 ** 18 * n_tokens)
+    _submit_batch(manager, owner, n_tokens, 5)
+
+    index = Indexer(manager.address, db_path, start_block=max(web3.eth.block_number - 20, 0), confirmations=0)
+    keeper = RetailKeeper(manager, index, signers=[owner], batch_size=100)
+    print(f"⏳ Before unlock: {len(keeper.run_once())} claims sent, next unlock at {keeper.next_unlock}")
+    chain.sleep(manager.retailLockPeriod() + 1)
+    chain.mine()
+    sent = keeper.run_once()
+    claimed = sum(len(batch) for _, batch, _ in sent)
+    print(f"✅ After unlock: {claimed} rewards claimed in {len(sent)} transaction(s)")
+    index.close()
+    return sent
@@ -0,0 +1,18 @@
+const fs = require("fs");
+const path = require("path");
+
+// 读取 Python 脚本写下的部署清单 deployments/<network>.json（见 scripts/manifest.py）
+// const { manifestAddress } = require("./manifest");
+// const address = process.env.PREDICTION_MARKET_CONTRACT_ADDRESS || manifestAddress("PredictionMarketNew");
+
+function manifestAddress(name, network) {
+    const hre = require("hardhat");
+    const file = path.join(__dirname, "..", "deployments", `${network || hre.network.name}.json`);
+    if (!fs.existsSync(file)) {
+        return undefined;
+    }
+    const entry = JSON.parse(fs.readFileSync(file, "utf8")).contracts[name];
+    return entry ? entry.address : undefined;
+}
+
+module.exports = { manifestAddress };
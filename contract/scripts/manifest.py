@@ -0,0 +1,112 @@
+"""
+按网络记录的部署清单：deployments/<network>.json
+
+每个合约记下地址、构造参数与创建字节码的 keccak256。再次部署时，若字节码哈希与参数都没变、
+清单记录的 chainId 与当前链一致、链上该地址的运行时代码也与 container.deployed_bytecode 相同，
+就直接 attach 已有实例（开发链重启后同一 deployer + nonce 可能落着另一个合约），只重新部署改动过的合约
+（依赖它的合约因构造参数里的地址变了，也会随之重新部署）。
+
+    manifest = Manifest()                       # 当前 brownie 网络
+    token = manifest.deploy(SwanToken, {'from': owner})
+    pm = manifest.deploy(PredictionMarketNew, token.address, amm.address, {'from': owner})
+
+JS 脚本可通过 scripts/manifest.js 按 hardhat 网络名读取同一份文件。
+"""
+import json
+import os
+
+from brownie import network, web3
+from eth_utils import keccak
+
+from scripts.instrument import InstrumentedContract, deploy as deploy_recorded
+
+MANIFEST_DIR = "deployments"
+
+
+def _code_bytes(code):
+    if isinstance(code, (bytes, bytearray)):
+        return bytes(code)
+    code = code[2:] if code.startswith("0x") else code
+    return bytes.fromhex(code)
+
+
+def same_runtime_code(on_chain, expected):
+    """
+    运行时代码比较：immutable 变量在 deployed_bytecode 里是全 0 占位，部署后才填入，
+    因此只允许在 expected 为 0 的字节上不同
+    """
+    if len(on_chain) != len(expected):
+        return False
+    return all(a == b or b == 0 for a, b in zip(on_chain, expected))
+
+
+def bytecode_hash(container):
+    return "0x" + keccak(_code_bytes(container.bytecode)).hex()
+
+
+def _normalize(value):
+    if hasattr(value, "address"):
+        return str(value.address)
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    if isinstance(value, bool):
+        return value
+    return str(value)
+
+
+class Manifest:
+    def __init__(self, network_name=None, path=None):
+        self.network = network_name or network.show_active()
+        self.path = path or os.path.join(MANIFEST_DIR, f"{self.network}.json")
+        self.entries = {}
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                data = json.load(f)
+            # 同名网络指向了另一条链（如换了 fork 或 chainId）：旧记录全部作废
+            if data.get("chainId") in (None, web3.eth.chain_id):
+                self.entries = data.get("contracts", {})
+            else:
+                print(f"⚠️ {self.path} was written for chainId {data['chainId']}, ignoring it")
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "w") as f:
+            json.dump({"network": self.network, "chainId": web3.eth.chain_id, "contracts": self.entries},
+                      f, indent=2, sort_keys=True)
+
+    def address(self, name):
+        entry = self.entries.get(name)
+        return entry["address"] if entry else None
+
+    def _reusable(self, container, name, code_hash, args):
+        entry = self.entries.get(name)
+        if not entry or entry["bytecodeHash"] != code_hash or entry["args"] != args:
+            return None
+        # 本地链重启后地址上可能没有代码，或是另一个合约：运行时代码必须与本合约一致
+        on_chain = bytes(web3.eth.get_code(entry["address"]))
+        if not same_runtime_code(on_chain, _code_bytes(container.deployed_bytecode)):
+            return None
+        return entry["address"]
+
+    def deploy(self, container, *args, recorder=None, name=None):
+        """与 container.deploy(*args) 相同的参数（最后一个为交易参数 dict）；可复用时直接 attach"""
+        name = name or container._name
+        ctor_args = list(args[:-1]) if args and isinstance(args[-1], dict) else list(args)
+        normalized = _normalize(ctor_args)
+        code_hash = bytecode_hash(container)
+
+        address = self._reusable(container, name, code_hash, normalized)
+        if address:
+            contract = container.at(address)
+            print(f"♻️ Reusing {name} at {address}")
+            return InstrumentedContract(contract, recorder) if recorder else contract
+
+        contract = deploy_recorded(recorder, container, *args) if recorder else container.deploy(*args)
+        self.entries[name] = {
+            "address": str(contract.address),
+            "args": normalized,
+            "bytecodeHash": code_hash,
+            "txHash": str(contract.tx.txid) if getattr(contract, "tx", None) else None,
+        }
+        self.save()
+        return contract
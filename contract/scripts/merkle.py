@@ -0,0 +1,191 @@
+"""
+SupplyChainManager 的 Merkle 批量派奖
+
+从索引器的 SQLite 里取出所有“已验证、未领取、已解锁”的 (tokenId, phase)，按提交者汇总成
+(account, amount, tokenIds, phases) 叶子，建树后发布本 epoch 的根；每个参与者用一个证明、
+一笔交易领取全部奖励（claimMerkle）。发布后叶子项登记在索引库的 merkle_published 表里，
+下一个 epoch 与零售 keeper 都跳过它们（合约里任一项被单独领取，整个叶子就会 revert）。
+
+叶子与合约一致（OpenZeppelin MerkleProof，排序后成对哈希，叶子双重哈希）：
+
+    keccak256(keccak256(abi.encode(epoch, account, amount, tokenIds, phases)))
+
+    brownie run scripts/merkle.py main <SupplyChainManager 地址> durian.db distribution.json --network kairos
+    brownie run scripts/merkle.py main <地址> durian.db distribution.json publish --network kairos
+"""
+import json
+from collections import defaultdict
+from dataclasses import asdict, dataclass
+
+from eth_utils import keccak, to_checksum_address
+
+try:
+    from eth_abi import encode
+except ImportError:  # eth-abi < 4（brownie 自带的版本）
+    from eth_abi import encode_abi as encode
+
+LEAF_TYPES = ["uint256", "address", "uint256", "uint256[]", "uint8[]"]
+FLAG_CHUNK = 500   # getFlagsBatch 每次查询的 tokenId 数
+
+
+def leaf_hash(epoch, account, amount, token_ids, phases):
+    inner = keccak(encode(LEAF_TYPES, [epoch, to_checksum_address(account), amount, list(token_ids), list(phases)]))
+    return keccak(inner)
+
+
+def _hash_pair(a, b):
+    return keccak(a + b) if a < b else keccak(b + a)
+
+
+class MerkleTree:
+    """与 MerkleProof.verify 兼容的树：叶子排序，成对哈希时按字节序排列，落单的节点直接上提"""
+
+    def __init__(self, leaves):
+        if not leaves:
+            raise ValueError("empty tree")
+        self.layers = [sorted(set(leaves))]
+        while len(self.layers[-1]) > 1:
+            layer = self.layers[-1]
+            parent = [_hash_pair(layer[i], layer[i + 1]) for i in range(0, len(layer) - 1, 2)]
+            if len(layer) % 2:
+                parent.append(layer[-1])
+            self.layers.append(parent)
+        self._index = {leaf: i for i, leaf in enumerate(self.layers[0])}
+
+    @property
+    def root(self):
+        return self.layers[-1][0]
+
+    def proof(self, leaf):
+        index = self._index[leaf]
+        proof = []
+        for layer in self.layers[:-1]:
+            sibling = index ^ 1
+            if sibling < len(layer):
+                proof.append(layer[sibling])
+            index //= 2
+        return proof
+
+
+def verify(proof, root, leaf):
+    node = leaf
+    for sibling in proof:
+        node = _hash_pair(node, sibling)
+    return node == root
+
+
+@dataclass
+class Claim:
+    account: str
+    amount: int
+    tokenIds: list
+    phases: list
+    proof: list
+
+
+def _still_claimable(manager, items):
+    """用链上 getFlagsBatch 复核：索引器可能落后于链，已领取或未验证的项剔除"""
+    token_ids = sorted({token_id for token_id, _, _ in items})
+    flags = {}
+    for i in range(0, len(token_ids), FLAG_CHUNK):
+        chunk = token_ids[i:i + FLAG_CHUNK]
+        flags.update(zip(chunk, manager.getFlagsBatch(chunk)))
+    kept = []
+    for token_id, phase, submitter in items:
+        bit = 1 << (phase - 1)
+        f = flags[token_id]
+        if f & (bit << 8) and not f & (bit << 16):
+            kept.append((token_id, phase, submitter))
+    return kept
+
+
+def build_distribution(manager, index, epoch=None, now=None, max_items=None):
+    """
+    生成一个 epoch 的派奖：{epoch, root, total, claims: {account: Claim}}。
+    max_items 限制每个叶子的项数（单笔领取的 gas 上限），超出的留到下一个 epoch。
+    """
+    epoch = epoch if epoch is not None else manager.merkleEpoch() + 1
+    if now is None:
+        from brownie import chain
+
+        now = chain.time()
+    rewards = {phase: manager.rewardForPhase(phase) for phase in range(1, 6)}
+
+    grouped = defaultdict(list)
+    for token_id, phase, submitter in _still_claimable(manager, index.claimable(now)):
+        grouped[to_checksum_address(submitter)].append((token_id, phase))
+
+    entries = {}
+    for account, items in sorted(grouped.items()):
+        items = items[:max_items] if max_items else items
+        token_ids = [t for t, _ in items]
+        phases = [p for _, p in items]
+        amount = sum(rewards[p] for p in phases)
+        entries[account] = (amount, token_ids, phases, leaf_hash(epoch, account, amount, token_ids, phases))
+    if not entries:
+        return None
+
+    tree = MerkleTree([leaf for *_, leaf in entries.values()])
+    claims = {
+        account: Claim(account, amount, token_ids, phases, ["0x" + p.hex() for p in tree.proof(leaf)])
+        for account, (amount, token_ids, phases, leaf) in entries.items()
+    }
+    return {
+        "epoch": epoch,
+        "root": "0x" + tree.root.hex(),
+        "total": sum(c.amount for c in claims.values()),
+        "claims": claims,
+    }
+
+
+def write_distribution(dist, path):
+    with open(path, "w") as f:
+        json.dump({**dist, "claims": {a: asdict(c) for a, c in dist["claims"].items()}}, f, indent=2)
+    return path
+
+
+def load_distribution(path):
+    with open(path) as f:
+        dist = json.load(f)
+    dist["claims"] = {a: Claim(**c) for a, c in dist["claims"].items()}
+    return dist
+
+
+def publish(manager, dist, admin, index=None):
+    """发布根；传入 index 时在索引库登记叶子项，之后的 epoch 与零售 keeper 都不再碰这些项"""
+    tx = manager.publishMerkleRoot(dist["epoch"], dist["root"], {'from': admin})
+    if index is not None:
+        index.record_published(dist["epoch"], dist["claims"])
+    return tx
+
+
+def claim(manager, dist, account, sender=None):
+    """为 account 提交 claimMerkle；sender 默认是 account 本人，也可由他人代付 gas"""
+    c = dist["claims"][to_checksum_address(str(account))]
+    return manager.claimMerkle(dist["epoch"], c.account, c.amount, c.tokenIds, c.phases, c.proof,
+                               {'from': sender or account})
+
+
+def main(address, db_path="durian_index.db", out="distribution.json", *flags):
+    from brownie import SupplyChainManager, accounts
+
+    from scripts.indexer import Indexer
+
+    manager = SupplyChainManager.at(address)
+    index = Indexer(address, db_path)
+    print(f"🔎 Syncing index {db_path}...")
+    index.sync(progress=False)
+
+    dist = build_distribution(manager, index)
+    if dist is None:
+        print("ℹ️ Nothing claimable")
+        return None
+    items = sum(len(c.tokenIds) for c in dist["claims"].values())
+    print(f"🌳 Epoch {dist['epoch']}: {len(dist['claims'])} accounts, {items} items, "
+          f"{dist['total'] / 1e18} tokens, root {dist['root']}")
+    print(f"📝 Written to {write_distribution(dist, out)}")
+
+    if "publish" in flags:
+        tx = publish(manager, dist, accounts[0], index)
+        print(f"✅ Root published in {tx.txid}")
+    return dist
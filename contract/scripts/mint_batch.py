@@ -0,0 +1,127 @@
+"""
+Durian721 批量铸造驱动
+
+读取一批次收获的 CSV，按区块 gas 上限切块后调用 mintDurianBatch / mintDurianList：
+
+    to,first_id,count            # 连续 tokenId
+    0xabc...,1001,300
+    to,token_ids                 # 任意 tokenId，空格分隔
+    0xabc...,7 9 12 15
+
+    brownie run scripts/mint_batch.py main harvest.csv <Durian721 地址> --network kairos
+    brownie run scripts/mint_batch.py bench        # 开发链上对比 1 / 50 / 500 个一批的每 token gas
+
+块大小 = (区块 gas 上限 × GAS_LIMIT_SHARE − 固定开销) / 每 token 边际 gas，
+两者都由一次 1 个与一次 PROBE_SIZE 个的 estimate_gas 得出。
+"""
+import csv
+
+from brownie import Durian721, accounts, chain, web3
+
+from scripts.instrument import Recorder
+from scripts.supply_chain import deploy_stack, grant_roles
+
+GAS_LIMIT_SHARE = 0.8   # 单笔最多用掉区块 gas 上限的比例
+PROBE_SIZE = 20
+BENCH_SIZES = (1, 50, 500)
+# bench 里逐个铸造时写入的 URI：与前端提交的 IPFS 元数据地址同样长度
+BENCH_BASE_URI = "ipfs://bafybeigdyrzt5sfp7udm7hu76uh7y26nf3efuylqabf3oclgtqy55fbzdi/"
+
+
+def read_batches(path):
+    """返回 [(to, [tokenId, ...], consecutive)]"""
+    batches = []
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            to = row["to"].strip()
+            if row.get("token_ids"):
+                batches.append((to, [int(t) for t in row["token_ids"].split()], False))
+            else:
+                first, count = int(row["first_id"]), int(row["count"])
+                batches.append((to, list(range(first, first + count)), True))
+    return batches
+
+
+def _unused_ids(nft, start, n):
+    """估算 gas 用：取一段尚未铸造的 tokenId"""
+    ids = []
+    token_id = start
+    while len(ids) < n:
+        try:
+            nft.ownerOf(token_id)
+        except Exception:
+            ids.append(token_id)
+        token_id += 1
+    return ids
+
+
+def chunk_size(nft, farmer, to, probe_start=2 ** 128):
+    """由 estimate_gas 推算每笔能放下的 token 数"""
+    ids = _unused_ids(nft, probe_start, PROBE_SIZE)
+    one = nft.mintDurianList.estimate_gas(to, ids[:1], {'from': farmer})
+    many = nft.mintDurianList.estimate_gas(to, ids, {'from': farmer})
+    per_token = max((many - one) / (PROBE_SIZE - 1), 1)
+    fixed = one - per_token
+    budget = web3.eth.get_block("latest")["gasLimit"] * GAS_LIMIT_SHARE
+    return max(int((budget - fixed) // per_token), 1), per_token
+
+
+def mint_batches(nft, farmer, batches, size=None, recorder=None):
+    """按 size 切块铸造；连续区间走 mintDurianBatch（calldata 更小），其余走 mintDurianList"""
+    if size is None and batches:
+        size, per_token = chunk_size(nft, farmer, batches[0][0])
+        print(f"📐 ~{per_token:.0f} gas per token, {size} tokens per transaction")
+    txs = []
+    for to, token_ids, consecutive in batches:
+        for i in range(0, len(token_ids), size):
+            part = token_ids[i:i + size]
+            if consecutive:
+                tx = nft.mintDurianBatch(to, part[0], len(part), {'from': farmer})
+            else:
+                tx = nft.mintDurianList(to, part, {'from': farmer})
+            if recorder:
+                recorder.add_receipt(f"{tx.fn_name}[{len(part)}]", tx, 0.0)
+            txs.append((len(part), tx))
+    return txs
+
+
+def bench(sizes=BENCH_SIZES):
+    owner = accounts[0]
+    recorder = Recorder("mint_batch")
+    _, nft, manager = deploy_stack(owner)
+    grant_roles(nft, manager, owner)
+    chain.snapshot()
+
+    rows = []
+    for n in sizes:
+        # 逐个铸造并各自存 URI（原流程） vs 批量铸造 + 一次 setSharedBaseURI（计入批量一侧）
+        chain.revert()
+        single = sum(
+            nft.mintDurian(owner, i, f"{BENCH_BASE_URI}{i}", {'from': owner}).gas_used for i in range(1, n + 1))
+        chain.revert()
+        base = nft.setSharedBaseURI(BENCH_BASE_URI, {'from': owner})
+        tx = nft.mintDurianBatch(owner, 1, n, {'from': owner})
+        assert nft.tokenURI(n) == f"{BENCH_BASE_URI}{n}"
+        recorder.add_receipt(f"mintDurianBatch[{n}]", tx, 0.0)
+        rows.append((n, single, base.gas_used + tx.gas_used))
+    chain.revert()
+
+    print("\n⛽ Gas per token: mintDurian with per-token URI vs setSharedBaseURI + mintDurianBatch")
+    print(f"  {'n':>5s} {'single/token':>14s} {'batch/token':>14s} {'saved':>8s}")
+    for n, single, batch in rows:
+        print(f"  {n:5d} {single / n:14.0f} {batch / n:14.0f} {1 - batch / single:8.1%}")
+    recorder.finish()
+    return rows
+
+
+def main(path, address=None, size=None):
+    farmer = accounts[0]
+    nft = Durian721.at(address) if address else Durian721[-1]
+    batches = read_batches(path)
+    total = sum(len(ids) for _, ids, _ in batches)
+    print(f"🌱 Minting {total} durians in {len(batches)} harvest batches...")
+    recorder = Recorder("mint_batch_run")
+    txs = mint_batches(nft, farmer, batches, int(size) if size else None, recorder)
+    gas = sum(tx.gas_used for _, tx in txs)
+    print(f"✅ {len(txs)} transactions, {gas} gas total, {gas / total:.0f} gas per token")
+    recorder.finish()
@@ -0,0 +1,202 @@
+"""
+多条本地开发链并行跑仿真矩阵
+
+每个工作进程各自启动一条独立的开发链（8546、8547 … 端口），部署一次市场合约并快照，
+之后每个任务先 chain.revert() 再跑 simulate.run_simulation。
+参数矩阵（市场参数 × 交易序列 × 结算结果）按任务分发到进程池，
+结果与 gas 样本汇总成一份报告。
+
+    brownie run scripts/parallel.py main            # 进程数 = CPU 核数
+    brownie run scripts/parallel.py main 8 reports/sweep.json
+"""
+import copy
+import itertools
+import json
+import multiprocessing as mp
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, replace
+
+BASE_PORT = 8546
+
+# 默认扫描的参数网格：字段名与 SimulationConfig 一致
+# LMSR 的 b（PredictionMarketNew.initialLiquidity()）由合约自身决定，createMarket 不接受该参数，
+# 脚本侧也没有可调用的 setter，所以无法在同一部署上扫描；每个任务的报告记录实际的 b，
+# 需要比较不同 b 时，对各自部署的合约分别运行并按 "b" 合并报告。
+DEFAULT_GRID = {
+    "n_markets": (1, 3),
+    "size_dist": ("fixed", "lognormal", "exponential"),
+    "size_mean": (10.0, 100.0, 1000.0),
+    "yes_skew": (0.2, 0.5, 0.8),
+    "by_amount_ratio": (0.0, 0.5, 1.0),
+    "outcome": ("A", "B"),
+}
+
+_worker = {}
+
+
+def build_matrix(base=None, grid=None, seeds=(0,)):
+    """网格的笛卡尔积 × seeds，得到一组 SimulationConfig"""
+    from scripts.simulate import SimulationConfig
+
+    base = base or SimulationConfig(n_traders=10, trades_per_trader=2)
+    grid = grid or DEFAULT_GRID
+    keys = list(grid)
+    configs = []
+    for values in itertools.product(*(grid[k] for k in keys)):
+        for seed in seeds:
+            configs.append(replace(base, seed=seed, **dict(zip(keys, values))))
+    return configs
+
+
+# --------- 工作进程 ---------
+
+def _add_dev_network(port):
+    """按 development 的配置复制一个只改端口的网络，相当于 `brownie networks add` 一个 dev-<port>"""
+    from brownie._config import CONFIG
+
+    network_id = f"dev-{port}"
+    if network_id not in CONFIG.networks:
+        settings = copy.deepcopy(CONFIG.networks["development"])
+        settings["id"] = network_id
+        settings["name"] = f"Ganache-CLI ({port})"
+        settings.setdefault("cmd_settings", {})["port"] = port
+        CONFIG.networks[network_id] = settings
+    return network_id
+
+
+def _init_worker(project_dir, ports):
+    port = ports.get()
+    sys.path.insert(0, project_dir)
+    from brownie import accounts, chain, network, project
+
+    project.load(project_dir)
+    network.connect(_add_dev_network(port))
+
+    from scripts.simulate import deploy_stack
+    from scripts.snapshot import ensure_multicall
+
+    owner = accounts[0]
+    _worker["port"] = port
+    _worker["owner"] = owner
+    _worker["stack"] = deploy_stack(owner)
+    _worker["b"] = int(_worker["stack"][2].initialLiquidity())
+    # Multicall2 必须在快照之前部署，否则第一个任务里惰性部署的合约会被下一次 chain.revert() 回滚掉
+    ensure_multicall(owner)
+    chain.snapshot()
+
+
+def _run_job(index, cfg):
+    from brownie import chain
+    from scripts.simulate import GasStats, run_simulation
+    from scripts.txengine import TxEngine
+
+    chain.revert()
+    stats = GasStats()
+    started = time.perf_counter()
+    # 每个任务一个引擎：回滚后链上 nonce 归位，不能沿用上一个任务缓存的本地 nonce
+    with TxEngine() as engine:
+        report = run_simulation(cfg, _worker["stack"], _worker["owner"], stats, engine)
+    return {
+        "index": index,
+        "port": _worker["port"],
+        "seconds": time.perf_counter() - started,
+        "config": asdict(cfg),
+        "b": _worker["b"],
+        "markets": report["markets"],
+        "market_balance_left": report["market_balance_left"],
+        "reconciled": all(r.ok for r in report["reconciliation"]),
+        "dust": sum(r.dust for r in report["reconciliation"]),
+        "leftover": sum(r.leftover for r in report["reconciliation"]),
+        "phases": report["phases"],
+        "gas_samples": {label: list(values) for label, values in stats.gas.items()},
+        "failed": dict(stats.failed),
+        "gas_retries": dict(stats.gas_retries),
+    }
+
+
+# --------- 调度与汇总 ---------
+
+def run_parallel(configs, workers=None, project_dir="."):
+    from scripts.simulate import GasStats
+
+    workers = min(workers or os.cpu_count() or 1, len(configs)) or 1
+    ctx = mp.get_context("spawn")   # 不继承父进程的 brownie 连接
+    ports = ctx.Manager().Queue()
+    for i in range(workers):
+        ports.put(BASE_PORT + i)
+
+    started = time.perf_counter()
+    jobs, errors = [], []
+    with ProcessPoolExecutor(workers, mp_context=ctx, initializer=_init_worker,
+                             initargs=(os.path.abspath(project_dir), ports)) as pool:
+        futures = {pool.submit(_run_job, i, cfg): i for i, cfg in enumerate(configs)}
+        for n, future in enumerate(as_completed(futures), 1):
+            try:
+                jobs.append(future.result())
+            except Exception as e:
+                errors.append({"index": futures[future], "config": asdict(configs[futures[future]]),
+                               "error": repr(e)})
+            print(f"  [{n}/{len(configs)}] done")
+    elapsed = time.perf_counter() - started
+
+    jobs.sort(key=lambda j: j["index"])
+    merged = GasStats()
+    for job in jobs:
+        for label, values in job.pop("gas_samples").items():
+            merged.gas[label].extend(values)
+        for label, count in job["failed"].items():
+            merged.failed[label] += count
+        for label, count in job["gas_retries"].items():
+            merged.gas_retries[label] += count
+    summary = merged.summary()
+    return {
+        "workers": workers,
+        "seconds": elapsed,
+        "jobs_per_second": len(configs) / elapsed if elapsed else 0.0,
+        "jobs": jobs,
+        "errors": errors,
+        "gas": summary["gas"],
+        "failed": summary["failed"],
+        "gas_retries": summary["gas_retries"],
+    }
+
+
+def print_parallel_report(report):
+    print(f"\n⏱️ {len(report['jobs'])} jobs on {report['workers']} chains in {report['seconds']:.1f}s "
+          f"({report['jobs_per_second']:.2f} jobs/s)")
+    b_values = sorted({j["b"] for j in report["jobs"]})
+    if b_values:
+        print(f"📈 LMSR b (initialLiquidity): {', '.join(str(b / 1e18) for b in b_values)}")
+    print("\n⛽ Gas per operation (all jobs):")
+    for label, g in sorted(report["gas"].items()):
+        print(f"  {label:16s} n={g['count']:6d} mean={g['mean']:.0f} p95={g['p95']:.0f} max={g['max']}")
+    bad = [j for j in report["jobs"] if not j["reconciled"]]
+    if report["gas_retries"]:
+        print(f"\n🔁 Out-of-gas retries: {report['gas_retries']}")
+    if report["failed"]:
+        print(f"\n❌ Failed transactions: {report['failed']}")
+    if bad:
+        print(f"\n❌ {len(bad)} job(s) did not reconcile:")
+        for j in bad:
+            print(f"  #{j['index']} {j['config']}")
+    if report["errors"]:
+        print(f"\n❌ {len(report['errors'])} job(s) raised:")
+        for e in report["errors"]:
+            print(f"  #{e['index']} {e['error']}")
+    if not bad and not report["errors"]:
+        print("\n✅ All jobs reconciled")
+
+
+def main(workers=None, out=os.path.join("reports", "parallel.json")):
+    configs = build_matrix()
+    print(f"🧮 Running {len(configs)} simulations...")
+    report = run_parallel(configs, int(workers) if workers else None)
+    print_parallel_report(report)
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2, default=str)
+    print(f"\n📝 Report written to {out}")
+    return report
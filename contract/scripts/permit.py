@@ -0,0 +1,131 @@
+"""
+EIP-2612 permit：离线批量签名授权 + 一笔交易充值 / 批量开户
+
+    sigs = sign_permits(reward_token, [farmer1, farmer2, ...], spender, amount)   # 每个 owner 一个签名，不上链
+    fund_rewards_with_permit(reward_token, manager, admin, amount)                # 1 笔交易代替 approve + fundRewards
+    mint_batch(reward_token, admin, recipients, amount)                           # 每 chunk 个地址 1 笔 mintBatch
+
+有私钥的账户（accounts.add / accounts.load）在本地用 eth_account 签名；
+开发链上无私钥的解锁账户走节点的 eth_signTypedData_v4。
+"""
+import json
+from dataclasses import dataclass
+
+from brownie import chain, web3
+from eth_account import Account
+
+try:
+    from eth_account.messages import encode_typed_data
+
+    def _encode(message):
+        return encode_typed_data(full_message=message)
+except ImportError:  # eth-account < 0.10（brownie 自带的版本）
+    from eth_account.messages import encode_structured_data as _encode
+
+PERMIT_TYPES = {
+    "EIP712Domain": [
+        {"name": "name", "type": "string"},
+        {"name": "version", "type": "string"},
+        {"name": "chainId", "type": "uint256"},
+        {"name": "verifyingContract", "type": "address"},
+    ],
+    "Permit": [
+        {"name": "owner", "type": "address"},
+        {"name": "spender", "type": "address"},
+        {"name": "value", "type": "uint256"},
+        {"name": "nonce", "type": "uint256"},
+        {"name": "deadline", "type": "uint256"},
+    ],
+}
+DEFAULT_TTL = 60 * 60   # 签名有效期（秒）
+MINT_CHUNK = 300        # 每笔 mintBatch 的地址数
+
+
+@dataclass
+class Permit:
+    owner: str
+    spender: str
+    value: int
+    deadline: int
+    v: int
+    r: str
+    s: str
+
+
+def permit_message(domain, owner, spender, value, nonce, deadline):
+    return {
+        "types": PERMIT_TYPES,
+        "primaryType": "Permit",
+        "domain": domain,
+        "message": {
+            "owner": str(owner),
+            "spender": str(spender),
+            "value": int(value),
+            "nonce": int(nonce),
+            "deadline": int(deadline),
+        },
+    }
+
+
+def token_domain(token):
+    # ERC20Permit(name_) 使用代币名与版本 "1"
+    return {
+        "name": token.name(),
+        "version": "1",
+        "chainId": chain.id,
+        "verifyingContract": str(token.address),
+    }
+
+
+def _sign(account, message):
+    key = getattr(account, "private_key", None)
+    if key:
+        signed = Account.sign_message(_encode(message), key)
+        return signed.v, signed.r, signed.s
+    # 解锁账户：由节点签名
+    signature = web3.manager.request_blocking("eth_signTypedData_v4", [str(account.address), json.dumps(message)])
+    sig = bytes.fromhex(signature[2:] if signature.startswith("0x") else signature)
+    v = sig[64] if sig[64] >= 27 else sig[64] + 27
+    return v, int.from_bytes(sig[:32], "big"), int.from_bytes(sig[32:64], "big")
+
+
+def sign_permits(token, owners, spender, value, deadline=None):
+    """为一组 owner 批量签名同一 spender / 金额的 permit；只读 nonce，不发交易"""
+    domain = token_domain(token)
+    deadline = deadline or chain.time() + DEFAULT_TTL
+    permits = []
+    for owner in owners:
+        message = permit_message(domain, owner.address, spender, value, token.nonces(owner.address), deadline)
+        v, r, s = _sign(owner, message)
+        permits.append(Permit(str(owner.address), str(spender), int(value), deadline, v,
+                              "0x" + r.to_bytes(32, "big").hex(), "0x" + s.to_bytes(32, "big").hex()))
+    return permits
+
+
+def fund_rewards_with_permit(reward_token, manager, admin, amount):
+    """一笔交易完成签名授权 + 充值"""
+    (p,) = sign_permits(reward_token, [admin], manager.address, amount)
+    return manager.fundRewardsWithPermit(amount, p.deadline, p.v, p.r, p.s, {'from': admin})
+
+
+def mint_batch(token, owner, recipients, amount, chunk=MINT_CHUNK):
+    """用 mintBatch 给大量地址铸币：1000 个地址约 4 笔交易"""
+    recipients = [str(getattr(r, "address", r)) for r in recipients]
+    txs = []
+    for i in range(0, len(recipients), chunk):
+        part = recipients[i:i + chunk]
+        txs.append(token.mintBatch(part, [amount] * len(part), {'from': owner}))
+    return txs
+
+
+def main(amount=10_000):
+    """本地链演示：fundRewardsWithPermit 一笔交易完成授权 + 充值（对比 approve + fundRewards 两笔）"""
+    from brownie import accounts
+
+    from scripts.supply_chain import deploy_stack
+
+    owner = accounts[0]
+    reward_token, _, manager = deploy_stack(owner)
+    tx = fund_rewards_with_permit(reward_token, manager, owner, int(amount) * 10 ** 18)
+    print(f"🏦 fundRewardsWithPermit in one transaction ({tx.gas_used} gas), "
+          f"manager balance {reward_token.balanceOf(manager.address) / 1e18}")
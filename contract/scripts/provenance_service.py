@@ -0,0 +1,277 @@
+"""
+溯源查询服务：SupplyChainManager + Durian721 前面的一层 asyncio HTTP 缓存
+
+    GET /provenance/<tokenId>   → owner、tokenURI、flags、零售解锁时间与 5 个阶段（含 packedData 解码）
+    GET /stats                  → 缓存命中 / 合并 / 上游读取计数
+
+同一 tokenId 的并发请求只触发一次上游读取（getProvenance + ownerOf + tokenURI），
+结果进 LRU；后台任务跟随新区块，只有日志里涉及某个 tokenId 时才让它的缓存失效，
+扫码高峰时同一批榴莲只读一次链。落后时按有上限的区块窗口追赶（同 scripts/indexer.py）。
+旧版 Durian721 的 setTokenURI 不发事件，所以条目另有 TTL（默认 5 分钟），新版发 MetadataUpdate 时立即失效。
+
+上游错误码：token 不存在（调用 revert）→ 404；节点连不上或超时 → 503；其余 RPC 错误 → 502。
+
+    brownie run scripts/provenance_service.py main <SupplyChainManager 地址> --network kairos
+    brownie run scripts/provenance_service.py main <地址> <Durian721 地址> 8080 --network kairos
+"""
+import asyncio
+import time
+from collections import OrderedDict
+
+from aiohttp import web
+from brownie import Durian721, SupplyChainManager, web3
+from brownie.exceptions import VirtualMachineError
+from eth_utils import event_abi_to_log_topic
+from requests.exceptions import ConnectionError as RPCConnectionError, Timeout as RPCTimeout
+from web3.exceptions import ContractLogicError
+
+from scripts.indexer import _hex
+from scripts.ingest import SCHEMAS, unpack
+
+# 这些事件的第一个 indexed 参数就是 tokenId
+TOKEN_EVENTS = ("PhaseSubmitted", "PhaseVerified", "RewardClaimed", "RetailReadySet")
+# 会影响所有 token 的事件：整体清空
+GLOBAL_EVENTS = ("RewardForPhaseSet", "SharedBaseURISet")
+TRANSFER_TOPIC = _hex(web3.keccak(text="Transfer(address,address,uint256)"))
+# EIP-4906：tokenId 不是 indexed 参数，在 data 里
+METADATA_UPDATE_TOPIC = _hex(web3.keccak(text="MetadataUpdate(uint256)"))
+
+
+def _topics(abi, names):
+    events = {e["name"]: e for e in abi if e.get("type") == "event"}
+    return {_hex(event_abi_to_log_topic(events[name])): name for name in names if name in events}
+
+
+def _is_revert(error):
+    """调用本身 revert（如 ownerOf 查不存在的 token），而不是节点 / 网络出错"""
+    if isinstance(error, ContractLogicError):
+        return True
+    return isinstance(error, VirtualMachineError) and "revert" in str(error).lower()
+
+
+class ProvenanceCache:
+    def __init__(
+        self,
+        manager,
+        nft,
+        max_entries=10_000,
+        poll_interval=2.0,
+        ttl=300.0,              # 条目最长存活秒数（None 不过期）：兜底旧版 setTokenURI 不发事件
+        max_chunk=2_000,        # 每次 get_logs 的最大区块窗口
+        max_lag=100_000,        # 落后超过这么多块时直接清空并跳到链头，比逐段追赶便宜
+    ):
+        self.manager = manager
+        self.nft = nft
+        self.max_entries = max_entries
+        self.poll_interval = poll_interval
+        self.ttl = ttl
+        self.max_chunk = max_chunk
+        self.max_lag = max_lag
+        self.chunk = max_chunk
+        self.chunk_cap = max_chunk      # 低于最近一次失败的窗口大小
+        self._cache = OrderedDict()     # tokenId -> (读取时间, provenance dict)
+        self._inflight = {}             # tokenId -> Future
+        self._stale = set()             # 读取期间被失效的 tokenId，结果不写缓存
+        self._token_topics = _topics(manager.abi, TOKEN_EVENTS)
+        self._global_topics = {**_topics(manager.abi, GLOBAL_EVENTS), **_topics(nft.abi, GLOBAL_EVENTS)}
+        self._merkle_topic = self._merkle_event = None
+        merkle = _topics(manager.abi, ("MerkleRewardClaimed",))
+        if merkle:
+            self._merkle_topic = next(iter(merkle))
+            self._merkle_event = web3.eth.contract(address=manager.address, abi=manager.abi).events.MerkleRewardClaimed()
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0, "upstream": 0, "invalidated": 0, "errors": 0}
+
+    # --------- 读取 ---------
+
+    async def get(self, token_id):
+        entry = self._cache.get(token_id)
+        if entry is not None and self.ttl is not None and time.monotonic() - entry[0] > self.ttl:
+            del self._cache[token_id]
+            entry = None
+        if entry is not None:
+            self._cache.move_to_end(token_id)
+            self.stats["hits"] += 1
+            return entry[1]
+        if token_id in self._inflight:
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(self._inflight[token_id])
+
+        self.stats["misses"] += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[token_id] = future
+        try:
+            result = await self._read(token_id)
+        except Exception as e:
+            self.stats["errors"] += 1
+            future.set_exception(e)
+            future.exception()   # 没有其他等待者时避免 “exception was never retrieved” 警告
+            raise
+        else:
+            future.set_result(result)
+            if token_id not in self._stale:
+                self._put(token_id, result)
+            return result
+        finally:
+            del self._inflight[token_id]
+            self._stale.discard(token_id)
+
+    def _put(self, token_id, value):
+        self._cache[token_id] = (time.monotonic(), value)
+        self._cache.move_to_end(token_id)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+
+    async def _read(self, token_id):
+        self.stats["upstream"] += 1
+        provenance, owner, uri = await asyncio.gather(
+            asyncio.to_thread(self.manager.getProvenance, token_id),
+            asyncio.to_thread(self.nft.ownerOf, token_id),
+            asyncio.to_thread(self.nft.tokenURI, token_id),
+        )
+        flags, retail_unlock, phases = provenance
+        return {
+            "tokenId": str(token_id),
+            "owner": str(owner),
+            "tokenURI": uri,
+            "flags": flags,
+            "retailReadyAt": retail_unlock,
+            "phases": [
+                {
+                    "phase": i,
+                    "submitted": p[0],
+                    "verified": p[1],
+                    "claimed": p[2],
+                    "submitter": str(p[3]),
+                    "submittedAt": p[4],
+                    "dataHash": _hex(p[5]),
+                    "packedData": str(p[6]),
+                    "decoded": unpack(i, p[6]) if p[0] and i in SCHEMAS else None,
+                    "reward": str(p[7]),
+                }
+                for i, p in enumerate(phases, 1)
+            ],
+        }
+
+    # --------- 失效 ---------
+
+    def invalidate(self, token_id=None):
+        if token_id is None:
+            self.stats["invalidated"] += len(self._cache)
+            self._cache.clear()
+            self._stale.update(self._inflight)
+            return
+        if token_id in self._inflight:
+            self._stale.add(token_id)
+        if self._cache.pop(token_id, None) is not None:
+            self.stats["invalidated"] += 1
+
+    def _apply_logs(self, logs):
+        for log in logs:
+            topic = _hex(log["topics"][0])
+            if topic in self._global_topics:
+                self.invalidate()
+            elif topic in self._token_topics:
+                self.invalidate(int.from_bytes(bytes(log["topics"][1]), "big"))
+            elif topic == TRANSFER_TOPIC and len(log["topics"]) == 4:
+                self.invalidate(int.from_bytes(bytes(log["topics"][3]), "big"))
+            elif topic == METADATA_UPDATE_TOPIC:
+                data = log["data"]
+                data = bytes.fromhex(data[2:]) if isinstance(data, str) else bytes(data)
+                self.invalidate(int.from_bytes(data[:32], "big"))
+            elif self._merkle_event is not None and topic == self._merkle_topic:
+                for token_id in self._merkle_event.processLog(log)["args"]["tokenIds"]:
+                    self.invalidate(token_id)
+
+    async def follow(self):
+        """跟随新区块，按日志里的 tokenId 精确失效；落后时按窗口分段追赶，失败只缩小窗口，不清空缓存"""
+        last = await asyncio.to_thread(lambda: web3.eth.block_number)
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                head = await asyncio.to_thread(lambda: web3.eth.block_number)
+            except Exception as e:
+                # 节点暂时不可用：last 不动，恢复后从断点补读日志
+                print(f"⚠️ Block follower error: {e!r}")
+                continue
+            if head - last > self.max_lag:
+                self.invalidate()
+                last = head
+                continue
+            last = await self._catch_up(last, head)
+
+    async def _catch_up(self, last, head):
+        """读取 (last, head] 的日志，返回实际处理到的区块"""
+        while last < head:
+            end = min(last + self.chunk, head)
+            try:
+                logs = await asyncio.to_thread(web3.eth.get_logs, {
+                    "address": [self.manager.address, self.nft.address],
+                    "fromBlock": last + 1,
+                    "toBlock": end,
+                })
+            except Exception as e:
+                if self.chunk > 1:
+                    # 结果过多或超时：记住失败的窗口，缩小后下轮重试
+                    self.chunk_cap = max(1, min(self.chunk_cap, end - last - 1))
+                    self.chunk = max(1, min(self.chunk // 2, self.chunk_cap))
+                    print(f"⚠️ get_logs {last + 1}..{end} failed ({e!r}), next window {self.chunk}")
+                    return last
+                # 单个区块也读不出来：无法知道哪些 token 变了，只能清空后越过它
+                print(f"⚠️ get_logs at block {end} failed ({e!r}), dropping cache")
+                self.invalidate()
+                return end
+            self._apply_logs(logs)
+            last = end
+            self.chunk = min(self.chunk_cap, self.chunk * 2)
+        return last
+
+
+def make_app(cache):
+    routes = web.RouteTableDef()
+
+    @routes.get("/provenance/{token_id}")
+    async def provenance(request):
+        try:
+            token_id = int(request.match_info["token_id"])
+        except ValueError:
+            return web.json_response({"error": "bad tokenId"}, status=400)
+        try:
+            return web.json_response(await cache.get(token_id))
+        except (RPCConnectionError, RPCTimeout) as e:
+            return web.json_response({"error": f"upstream unavailable: {e}"}, status=503)
+        except Exception as e:
+            if _is_revert(e):
+                # ownerOf 对不存在的 token 会 revert
+                return web.json_response({"error": str(e)}, status=404)
+            return web.json_response({"error": f"upstream error: {e}"}, status=502)
+
+    @routes.get("/stats")
+    async def stats(request):
+        return web.json_response({**cache.stats, "entries": len(cache._cache), "inflight": len(cache._inflight)})
+
+    @web.middleware
+    async def cors(request, handler):
+        response = await handler(request)
+        response.headers["Access-Control-Allow-Origin"] = "*"
+        return response
+
+    app = web.Application(middlewares=[cors])
+    app.add_routes(routes)
+
+    async def start_follower(app):
+        app["follower"] = asyncio.create_task(cache.follow())
+
+    async def stop_follower(app):
+        app["follower"].cancel()
+
+    app.on_startup.append(start_follower)
+    app.on_cleanup.append(stop_follower)
+    return app
+
+
+def main(manager_address, nft_address=None, port=8080, max_entries=10_000):
+    manager = SupplyChainManager.at(manager_address)
+    nft = Durian721.at(nft_address or manager.nft())
+    cache = ProvenanceCache(manager, nft, int(max_entries))
+    print(f"🌐 Serving provenance for {manager.address} / {nft.address} on :{port}")
+    web.run_app(make_app(cache), port=int(port))
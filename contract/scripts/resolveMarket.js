@@ -1,8 +1,10 @@
 const { ethers } = require("hardhat");
+const { manifestAddress } = require("./manifest");
 
 // npx hardhat run scripts/resolveMarket.js --network kairos
 
-const marketContractAddress = process.env.PREDICTION_MARKET_CONTRACT_ADDRESS; 
+const marketContractAddress =
+    process.env.PREDICTION_MARKET_CONTRACT_ADDRESS || manifestAddress("PredictionMarketNew"); 
 
 // 枚举 MarketOutcome 的值
 const MarketOutcome = {
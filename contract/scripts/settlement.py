@@ -0,0 +1,218 @@
+"""
+结算与派奖对账
+
+按合约的按份额比例规则（与 deploy.py 末尾的手工核对一致），用整数 wei 为已结算市场的
+每个赢家算出应得金额：
+
+    payout_i = paid_i + shares_i * (losingPayments + marketCost) // totalWinningShares
+
+全部以 object 数组批量计算（精确大整数，无 1e18 浮点误差），可一次处理多个市场、数万持有人；
+再与 claimWinnings 的实际转账对账，报告资不抵债的市场，以及留在合约里的两部分资金：
+    dust      按比例分配向下取整的舍入余数（各处同一定义）
+    leftover  其余未派给已知赢家的资金（未领取 / 未统计持有人的份额、流动性等）
+"""
+from dataclasses import dataclass, field
+
+import numpy as np
+from eth_utils import keccak, to_checksum_address
+
+TRANSFER_TOPIC = "0x" + keccak(text="Transfer(address,address,uint256)").hex()
+OUTCOME_A = 1
+OUTCOME_B = 2
+
+
+def _ints(values):
+    return np.asarray([int(v) for v in values], dtype=object)
+
+
+def _bytes(value):
+    if isinstance(value, str):
+        return bytes.fromhex(value[2:] if value.startswith("0x") else value)
+    return bytes(value)
+
+
+@dataclass
+class MarketBook:
+    """一个已结算市场的赢家账本"""
+    market_id: int
+    outcome: int
+    total_winning_shares: int
+    winning_payments: int
+    losing_payments: int
+    market_cost: int
+    holders: list = field(default_factory=list)
+    shares: np.ndarray = None    # 赢家持有的获胜方份额
+    paid: np.ndarray = None      # 赢家在获胜方的投入
+
+    @property
+    def reward_pool(self):
+        return self.losing_payments + self.market_cost
+
+    @property
+    def funds(self):
+        """该市场可用于派奖的资金：双方投入 + 初始市场成本"""
+        return self.winning_payments + self.losing_payments + self.market_cost
+
+
+@dataclass
+class Settlement:
+    market_id: int
+    holders: list
+    payouts: np.ndarray
+    total: int
+    funds: int
+    dust: int            # 按比例分配的舍入余数（留在合约里）
+    leftover: int        # funds - total - dust：舍入以外未派出的资金
+
+    @property
+    def solvent(self):
+        return self.total <= self.funds
+
+
+def _rounding_dust(shares, pro_rata, reward_pool, total_winning_shares):
+    """这些持有人的精确份额之和与取整后之和的差（wei）；持有人覆盖全部获胜份额时即 reward_pool - sum(pro_rata)"""
+    if total_winning_shares == 0 or not len(shares):
+        return 0
+    exact = int(reward_pool) * int(shares.sum())
+    return (exact - int(total_winning_shares) * int(pro_rata.sum())) // int(total_winning_shares)
+
+
+def compute_payouts(shares, paid, reward_pool, total_winning_shares):
+    """向量化的整数派奖；返回 (payouts, dust)"""
+    shares = _ints(shares)
+    paid = _ints(paid)
+    if total_winning_shares == 0:
+        return paid.copy(), 0
+    pro_rata = shares * int(reward_pool) // int(total_winning_shares)
+    return paid + pro_rata, _rounding_dust(shares, pro_rata, reward_pool, total_winning_shares)
+
+
+def settle(book):
+    return settle_many([book])[book.market_id]
+
+
+def settle_many(books):
+    """多个市场一起结算：拼成一条数组计算，再按市场切回"""
+    if not books:
+        return {}
+    sizes = [len(b.holders) for b in books]
+    shares = np.concatenate([_ints(b.shares) for b in books])
+    paid = np.concatenate([_ints(b.paid) for b in books])
+    pool = np.repeat(_ints([b.reward_pool for b in books]), sizes)
+    total_shares = np.repeat(_ints([max(b.total_winning_shares, 1) for b in books]), sizes)
+    pro_rata = shares * pool // total_shares
+    payouts = paid + pro_rata
+
+    result = {}
+    offset = 0
+    for book, n in zip(books, sizes):
+        part = payouts[offset:offset + n]
+        dust = _rounding_dust(shares[offset:offset + n], pro_rata[offset:offset + n],
+                              book.reward_pool, book.total_winning_shares)
+        if book.total_winning_shares == 0:
+            part = _ints(book.paid)
+        total = int(part.sum()) if n else 0
+        result[book.market_id] = Settlement(book.market_id, list(book.holders), part, total, book.funds,
+                                            dust, book.funds - total - dust)
+        offset += n
+    return result
+
+
+# --------- 从链上收集账本 ---------
+
+def transfers_in_receipts(receipts, token_address, sender=None, recipient=None):
+    """从一批回执里提取 ERC20 Transfer，返回 {(from, to): amount} 的累计"""
+    token_address = to_checksum_address(str(token_address))
+    totals = {}
+    for receipt in receipts:
+        for log in receipt["logs"]:
+            topics = log["topics"]
+            if to_checksum_address(log["address"]) != token_address or len(topics) != 3:
+                continue
+            if "0x" + _bytes(topics[0]).hex() != TRANSFER_TOPIC:
+                continue
+            src = to_checksum_address(_bytes(topics[1])[-20:])
+            dst = to_checksum_address(_bytes(topics[2])[-20:])
+            if (sender and src != sender) or (recipient and dst != recipient):
+                continue
+            amount = int.from_bytes(_bytes(log["data"]), "big")
+            totals[(src, dst)] = totals.get((src, dst), 0) + amount
+    return totals
+
+
+def build_books(reader, market_ids, outcomes, holders, paid, market_costs, block=None):
+    """
+    用一次快照读取所有持有人份额，构造每个市场的赢家账本。
+    paid[market_id][address] 为该地址在获胜方的投入，market_costs[market_id] 为创建时的市场成本。
+    """
+    snap = reader.read(market_ids, holders, block)
+    books = []
+    for m in market_ids:
+        state = snap.markets[m]
+        side = 0 if outcomes[m] == OUTCOME_A else 1
+        winners = [a for a, acc in snap.accounts.items() if acc.shares[m][side] > 0]
+        total_winning = state.total_a if side == 0 else state.total_b
+        winning_payments, losing_payments = (
+            (state.payments_a, state.payments_b) if side == 0 else (state.payments_b, state.payments_a)
+        )
+        books.append(MarketBook(
+            market_id=m,
+            outcome=outcomes[m],
+            total_winning_shares=total_winning,
+            winning_payments=winning_payments,
+            losing_payments=losing_payments,
+            market_cost=market_costs[m],
+            holders=winners,
+            shares=_ints(snap.accounts[a].shares[m][side] for a in winners),
+            paid=_ints(paid.get(m, {}).get(a, 0) for a in winners),
+        ))
+    return books
+
+
+# --------- 对账 ---------
+
+@dataclass
+class Reconciliation:
+    market_id: int
+    expected_total: int
+    actual_total: int
+    funds: int
+    dust: int            # 预期的舍入余数（同 Settlement.dust）
+    leftover: int        # funds - actual_total - dust：实际派奖后舍入以外留下的资金
+    mismatches: list     # [(holder, expected, actual)]
+
+    @property
+    def ok(self):
+        return not self.mismatches and self.actual_total <= self.funds
+
+
+def reconcile(settlement, actual):
+    """actual: {holder: 实际到账}，与 settlement 逐人比较"""
+    actual_arr = _ints(actual.get(h, 0) for h in settlement.holders)
+    diff = actual_arr - settlement.payouts if len(actual_arr) else actual_arr
+    mismatches = [
+        (settlement.holders[i], int(settlement.payouts[i]), int(actual_arr[i]))
+        for i in np.flatnonzero(diff != 0)
+    ]
+    actual_total = int(actual_arr.sum()) if len(actual_arr) else 0
+    return Reconciliation(
+        market_id=settlement.market_id,
+        expected_total=settlement.total,
+        actual_total=actual_total,
+        funds=settlement.funds,
+        dust=settlement.dust,
+        leftover=settlement.funds - actual_total - settlement.dust,
+        mismatches=mismatches,
+    )
+
+
+def print_reconciliation(recs, limit=5):
+    for r in recs:
+        status = "✅" if r.ok else "❌"
+        print(f"{status} market {r.market_id}: expected {r.expected_total / 1e18}, actual {r.actual_total / 1e18}, "
+              f"funds {r.funds / 1e18}, dust {r.dust} wei, leftover {r.leftover / 1e18}, "
+              f"mismatches {len(r.mismatches)}")
+        for holder, expected, actual in r.mismatches[:limit]:
+            print(f"    {holder}: expected {expected}, actual {actual}, diff {actual - expected}")
+        if r.actual_total > r.funds:
+            print(f"    ⚠️ Insolvent by {(r.actual_total - r.funds) / 1e18} tokens")
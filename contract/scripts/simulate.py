@@ -0,0 +1,275 @@
+"""
+参数化的市场压测/仿真
+
+在 deploy.py 的流程基础上，把市场数、交易者数、下单规模分布、Yes/No 倾向、
+buyByShares 与 buyByAmount 的比例都做成参数，跑完整的 创建 → 交易 → 结算 → 领奖 周期，
+并输出吞吐、各操作 gas，以及 deploy.py 手工打印的偿付检查（实付 vs 应付、市场剩余余额）。
+
+    brownie run scripts/simulate.py main 4 200
+"""
+import json
+import time
+from collections import defaultdict
+from dataclasses import asdict, dataclass
+
+import numpy as np
+from brownie import SwanToken, PredictionMarketNew, AutomatedMarketMaker, accounts, chain
+
+from scripts.settlement import build_books, print_reconciliation, reconcile, settle_many, transfers_in_receipts
+from scripts.snapshot import SnapshotReader
+from scripts.txengine import TxEngine, contract_tx, fund_traders, mint_and_approve
+
+OUTCOME_A = 1
+OUTCOME_B = 2
+
+
+@dataclass
+class SimulationConfig:
+    n_markets: int = 2
+    n_traders: int = 20
+    trades_per_trader: int = 2
+    size_dist: str = "lognormal"   # fixed | uniform | lognormal | exponential
+    size_mean: float = 100.0       # 代币/份额单位（未乘 1e18）
+    size_spread: float = 0.75
+    yes_skew: float = 0.5          # 买 Yes 的概率
+    by_amount_ratio: float = 0.5   # 使用 buyByAmount 的比例
+    outcome: str = "random"        # A | B | random
+    duration: int = 60 * 60 * 24
+    mint_amount: int = 100_000
+    gas_eth: float = 1.0
+    seed: int = 0
+
+
+def sample_sizes(cfg, rng, n):
+    if cfg.size_dist == "fixed":
+        sizes = np.full(n, cfg.size_mean)
+    elif cfg.size_dist == "uniform":
+        lo = cfg.size_mean * (1 - cfg.size_spread)
+        hi = cfg.size_mean * (1 + cfg.size_spread)
+        sizes = rng.uniform(lo, hi, n)
+    elif cfg.size_dist == "lognormal":
+        sigma = cfg.size_spread
+        sizes = rng.lognormal(np.log(cfg.size_mean) - sigma ** 2 / 2, sigma, n)
+    elif cfg.size_dist == "exponential":
+        sizes = rng.exponential(cfg.size_mean, n)
+    else:
+        raise ValueError(f"unknown size distribution: {cfg.size_dist}")
+    # 转为 18 位精度的整数，保留 6 位小数
+    return [int(s * 10 ** 6) * 10 ** 12 for s in np.maximum(sizes, 1e-6)]
+
+
+class GasStats:
+    def __init__(self):
+        self.gas = defaultdict(list)
+        self.failed = defaultdict(int)
+        self.gas_retries = defaultdict(int)    # 耗尽 gas 后重新估算重发的次数
+        self.phases = {}
+
+    def record(self, results):
+        for r in results:
+            if r.gas_retries:
+                self.gas_retries[r.tx.label] += r.gas_retries
+            if r.ok:
+                self.gas[r.tx.label].append(r.receipt["gasUsed"])
+            else:
+                self.failed[r.tx.label] += 1
+        return results
+
+    def phase(self, name, started, n_tx):
+        elapsed = time.perf_counter() - started
+        self.phases[name] = {"tx": n_tx, "seconds": elapsed, "tps": n_tx / elapsed if elapsed else 0.0}
+
+    def summary(self):
+        ops = {}
+        for label, values in self.gas.items():
+            arr = np.asarray(values)
+            ops[label] = {"count": len(values), "mean": float(arr.mean()), "p50": float(np.percentile(arr, 50)),
+                          "p95": float(np.percentile(arr, 95)), "max": int(arr.max())}
+        return {"gas": ops, "failed": dict(self.failed), "gas_retries": dict(self.gas_retries),
+                "phases": self.phases}
+
+
+def deploy_stack(owner, manifest=None):
+    """传入 scripts.manifest.Manifest 时，字节码与参数未变的合约直接复用"""
+    deploy = manifest.deploy if manifest else (lambda container, *args: container.deploy(*args))
+    betting_token = deploy(SwanToken, {'from': owner})
+    amm = deploy(AutomatedMarketMaker, {'from': owner})
+    prediction_market = deploy(PredictionMarketNew, betting_token.address, amm.address, {'from': owner})
+    return betting_token, amm, prediction_market
+
+
+def make_traders(n, owner):
+    # 开发链自带 10 个账户，其余用本地新生成的账户补足
+    pool = [a for a in accounts if a != owner]
+    while len(pool) < n:
+        pool.append(accounts.add())
+    return pool[:n]
+
+
+def run_simulation(cfg, stack=None, owner=None, stats=None, engine=None):
+    """engine 为空时自建一个 TxEngine，并在返回前关闭其线程池"""
+    if engine is None:
+        with TxEngine() as engine:
+            return run_simulation(cfg, stack, owner, stats, engine)
+    rng = np.random.default_rng(cfg.seed)
+    owner = owner or accounts[0]
+    stats = stats or GasStats()
+
+    betting_token, amm, prediction_market = stack or deploy_stack(owner)
+    reader = SnapshotReader(prediction_market, betting_token)
+    unit = 10 ** betting_token.decimals()
+    traders = make_traders(cfg.n_traders, owner)
+
+    # 1️⃣ 资金准备：gas、铸币、授权
+    started = time.perf_counter()
+    new_accounts = [t for t in traders if getattr(t, "private_key", None)]
+    stats.record(fund_traders(engine, owner, new_accounts, int(cfg.gas_eth * 10 ** 18)))
+    mint_amount = cfg.mint_amount * unit
+    setup = stats.record(mint_and_approve(
+        engine, betting_token, owner, traders + [owner], mint_amount, [prediction_market.address, amm.address]))
+    stats.phase("setup", started, len(setup) + len(new_accounts))
+
+    # 2️⃣ 创建市场
+    started = time.perf_counter()
+    market_ids = []
+    for i in range(cfg.n_markets):
+        tx = prediction_market.createMarket(f"Simulated market #{i}", "Yes", "No", cfg.duration, {'from': owner})
+        stats.gas["createMarket"].append(tx.gas_used)
+        market_ids.append(tx.return_value)
+    stats.phase("create", started, cfg.n_markets)
+    initial = reader.read(market_ids)
+    initial_cost = {m: initial.markets[m].cost for m in market_ids}
+
+    # 3️⃣ 交易：每个 trader 在随机市场上下 trades_per_trader 单
+    n_orders = cfg.n_traders * cfg.trades_per_trader
+    sizes = sample_sizes(cfg, rng, n_orders)
+    is_yes = rng.random(n_orders) < cfg.yes_skew
+    by_amount = rng.random(n_orders) < cfg.by_amount_ratio
+    targets = rng.integers(0, cfg.n_markets, n_orders)
+    jobs = []
+    for i in range(n_orders):
+        trader = traders[i % cfg.n_traders]
+        fn = "buyByAmount" if by_amount[i] else "buyByShares"
+        jobs.append(contract_tx(trader, prediction_market, fn, market_ids[targets[i]], bool(is_yes[i]), sizes[i]))
+    started = time.perf_counter()
+    trade_results = stats.record(engine.run(jobs))
+    stats.phase("trade", started, n_orders)
+
+    # 每笔成交的实际扣款，按 (市场, 交易者, 方向) 累计，供结算账本使用
+    spent = defaultdict(int)
+    for i, r in enumerate(trade_results):
+        if not r.ok:
+            continue
+        trader = traders[i % cfg.n_traders].address
+        amount = sum(transfers_in_receipts([r.receipt], betting_token.address, sender=trader).values())
+        spent[(market_ids[targets[i]], trader, bool(is_yes[i]))] += amount
+
+    # 4️⃣ 到期并结算
+    chain.sleep(cfg.duration + 1)
+    chain.mine(2)
+    outcomes = {}
+    started = time.perf_counter()
+    for m in market_ids:
+        if cfg.outcome == "random":
+            outcome = OUTCOME_A if rng.random() < 0.5 else OUTCOME_B
+        else:
+            outcome = OUTCOME_A if cfg.outcome.upper() == "A" else OUTCOME_B
+        tx = prediction_market.resolveMarket(m, outcome, {'from': owner})
+        stats.gas["resolveMarket"].append(tx.gas_used)
+        outcomes[m] = outcome
+    stats.phase("resolve", started, len(market_ids))
+
+    # 5️⃣ 领奖：一次快照找出所有赢家，再并发提交 claimWinnings
+    before = reader.read(market_ids, traders + [prediction_market])
+    claim_jobs, claim_keys = [], []
+    winners = defaultdict(list)
+    for m in market_ids:
+        side = 0 if outcomes[m] == OUTCOME_A else 1
+        for t in traders:
+            if before.accounts[t.address].shares[m][side] > 0:
+                winners[m].append(t)
+                claim_keys.append((m, t.address))
+                claim_jobs.append(contract_tx(t, prediction_market, "claimWinnings", m))
+    # 领奖前先按整数规则算出每个赢家的应得金额
+    paid = defaultdict(dict)
+    for (m, trader, yes), amount in spent.items():
+        if yes == (outcomes[m] == OUTCOME_A):
+            paid[m][trader] = amount
+    books = build_books(reader, market_ids, outcomes, [t.address for t in traders], paid, initial_cost)
+    settlements = settle_many(books)
+
+    started = time.perf_counter()
+    claim_results = stats.record(engine.run(claim_jobs))
+    stats.phase("claim", started, len(claim_jobs))
+    after = reader.read(market_ids, traders + [prediction_market])
+
+    actual = defaultdict(dict)
+    for (m, trader), r in zip(claim_keys, claim_results):
+        if r.ok:
+            actual[m][trader] = sum(
+                transfers_in_receipts([r.receipt], betting_token.address, recipient=trader).values())
+    reconciliations = [reconcile(settlements[m], actual[m]) for m in market_ids]
+
+    # 6️⃣ 偿付检查：应付 = 输家池 + 赢家投入 + 初始市场成本
+    solvency = {}
+    for m in market_ids:
+        state = before.markets[m]
+        expected = state.payments_a + state.payments_b + initial_cost[m]
+        paid_total = sum(
+            after.accounts[t.address].token_balance - before.accounts[t.address].token_balance
+            for t in winners[m]
+        )
+        solvency[m] = {
+            "outcome": "A" if outcomes[m] == OUTCOME_A else "B",
+            "winners": len(winners[m]),
+            "paid": paid_total,
+            "expected": expected,
+            "diff": paid_total - expected,
+        }
+    leftover = after.accounts[prediction_market.address].token_balance
+
+    report = {
+        "config": asdict(cfg),
+        "markets": solvency,
+        "market_balance_left": leftover,
+        "reconciliation": reconciliations,
+        **stats.summary(),
+    }
+    return report
+
+
+def print_report(report):
+    print("\n⏱️ Throughput:")
+    for name, p in report["phases"].items():
+        print(f"  {name:8s} {p['tx']:6d} tx in {p['seconds']:.2f}s ({p['tps']:.1f} tx/s)")
+    print("\n⛽ Gas per operation:")
+    for label, g in sorted(report["gas"].items()):
+        print(f"  {label:16s} n={g['count']:5d} mean={g['mean']:.0f} p95={g['p95']:.0f} max={g['max']}")
+    if report["gas_retries"]:
+        print(f"\n🔁 Out-of-gas retries: {report['gas_retries']}")
+    if report["failed"]:
+        print(f"\n❌ Failed transactions: {report['failed']}")
+    print("\n💰 Solvency:")
+    for m, s in report["markets"].items():
+        print(f"  market {m} ({s['outcome']}): paid {s['paid'] / 1e18}, expected {s['expected'] / 1e18}, "
+              f"diff {s['diff'] / 1e18}, winners {s['winners']}")
+    print(f"🏦 PredictionMarket Balance After All: {report['market_balance_left'] / 1e18} tokens")
+    print("\n🧮 Reconciliation (integer pro-rata vs claimWinnings transfers):")
+    print_reconciliation(report["reconciliation"])
+
+
+def main(n_markets=2, n_traders=20, trades_per_trader=2, yes_skew=0.5, by_amount_ratio=0.5, out=None):
+    cfg = SimulationConfig(
+        n_markets=int(n_markets),
+        n_traders=int(n_traders),
+        trades_per_trader=int(trades_per_trader),
+        yes_skew=float(yes_skew),
+        by_amount_ratio=float(by_amount_ratio),
+    )
+    report = run_simulation(cfg)
+    print_report(report)
+    if out:
+        with open(out, "w") as f:
+            json.dump(report, f, indent=2, default=str)
+        print(f"\n📝 Report written to {out}")
+    return report
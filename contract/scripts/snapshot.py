@@ -0,0 +1,125 @@
+"""
+按区块固定的市场快照读取器
+
+把一批市场的 getMarketInfo / getMarginalPrices / getMarketPayments / getMarketCost，
+以及一批账户的 getSharesBalance / balanceOf，在同一个区块上用一次 Multicall2 聚合调用读完，
+结果是带类型的记录，并按区块哈希缓存（开发链 chain.revert() 后区块号会被复用，哈希不会）。
+
+    reader = SnapshotReader(prediction_market, betting_token)
+    snap = reader.read([market_id], [user1, user2, user3])
+    snap.markets[market_id].total_a, snap.accounts[user1.address].shares[market_id]
+"""
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+from brownie import multicall, web3
+from brownie._config import CONFIG
+
+from scripts.lmsr import TOTAL_A_INDEX, TOTAL_B_INDEX
+
+
+@dataclass(frozen=True)
+class MarketState:
+    market_id: int
+    info: tuple
+    total_a: int
+    total_b: int
+    price_a: int
+    price_b: int
+    payments_a: int
+    payments_b: int
+    cost: int
+
+
+@dataclass(frozen=True)
+class AccountState:
+    address: str
+    token_balance: int
+    shares: dict = field(default_factory=dict)  # market_id => (sharesA, sharesB)
+
+
+@dataclass(frozen=True)
+class MarketSnapshot:
+    block_number: int
+    markets: dict   # market_id => MarketState
+    accounts: dict  # address => AccountState
+
+
+def ensure_multicall(deployer):
+    """
+    开发链上 brownie 在第一次进入 multicall 时才部署 Multicall2。若这一步发生在 chain.snapshot() 之后，
+    chain.revert() 会把合约回滚掉，而配置里仍记着它的地址；在打快照之前调用本函数先把它部署好。
+    """
+    address = CONFIG.active_network.get("multicall2")
+    if not address or not web3.eth.get_code(address):
+        multicall.deploy({'from': deployer})
+
+
+def _address(account):
+    return getattr(account, "address", account)
+
+
+class SnapshotReader:
+    def __init__(self, prediction_market, betting_token, cache_size=64):
+        self.prediction_market = prediction_market
+        self.betting_token = betting_token
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+
+    def read(self, market_ids, accounts=(), block=None):
+        """在 block（默认最新块）读取快照；同一区块哈希、同一参数的请求直接命中缓存"""
+        header = web3.eth.get_block("latest" if block is None else block)
+        block = header["number"]
+        market_ids = tuple(int(m) for m in market_ids)
+        addresses = tuple(_address(a) for a in accounts)
+        key = (bytes(header["hash"]), market_ids, addresses)
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+
+        snap = self._fetch(block, market_ids, addresses)
+        self._cache[key] = snap
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return snap
+
+    def clear(self):
+        self._cache.clear()
+
+    def _fetch(self, block, market_ids, addresses):
+        pm = self.prediction_market
+        token = self.betting_token
+        # multicall 上下文内的调用返回惰性代理，退出时合并为一次 aggregate 调用
+        with multicall(block_identifier=block):
+            market_calls = [
+                (m, pm.getMarketInfo(m), pm.getMarginalPrices(m), pm.getMarketPayments(m), pm.getMarketCost(m))
+                for m in market_ids
+            ]
+            account_calls = [
+                (a, token.balanceOf(a), [(m, pm.getSharesBalance(m, a)) for m in market_ids])
+                for a in addresses
+            ]
+
+        markets = {}
+        for m, info, prices, payments, cost in market_calls:
+            info = tuple(info)
+            markets[m] = MarketState(
+                market_id=m,
+                info=info,
+                total_a=int(info[TOTAL_A_INDEX]),
+                total_b=int(info[TOTAL_B_INDEX]),
+                price_a=int(prices[0]),
+                price_b=int(prices[1]),
+                payments_a=int(payments[0]),
+                payments_b=int(payments[1]),
+                cost=int(cost),
+            )
+
+        accounts = {}
+        for a, balance, shares in account_calls:
+            accounts[a] = AccountState(
+                address=a,
+                token_balance=int(balance),
+                shares={m: (int(s[0]), int(s[1])) for m, s in shares},
+            )
+        return MarketSnapshot(block_number=block, markets=markets, accounts=accounts)
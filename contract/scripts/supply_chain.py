@@ -0,0 +1,52 @@
+"""
+SupplyChainManager / Durian721 / RewardToken 的部署与常用准备步骤（与 deploy.js 相同的组合）
+"""
+from brownie import RewardToken, Durian721, SupplyChainManager, web3
+
+PHASE_ROLES = {
+    1: "FARMER_ROLE",
+    2: "FARMER_ROLE",
+    3: "PACKER_ROLE",
+    4: "LOGISTICS_ROLE",
+    5: "RETAIL_ROLE",
+}
+
+
+def role_id(name):
+    return web3.keccak(text=name)
+
+
+def deploy_stack(owner, initial_supply=1_000_000 * 10 ** 18, manifest=None):
+    """传入 scripts.manifest.Manifest 时，字节码与参数未变的合约直接复用"""
+    deploy = manifest.deploy if manifest else (lambda container, *args: container.deploy(*args))
+    reward_token = deploy(RewardToken, "Durian Reward Token", "DRT", initial_supply, {'from': owner})
+    nft = deploy(Durian721, {'from': owner})
+    manager = deploy(SupplyChainManager, reward_token.address, nft.address, {'from': owner})
+    return reward_token, nft, manager
+
+
+def grant_roles(nft, manager, owner, farmer=None, packer=None, logistics=None, retail=None):
+    """按阶段授予角色；未指定的角色授予 owner（演示单账号模式）"""
+    farmer = farmer or owner
+    nft.grantRole(role_id("FARMER_ROLE"), farmer, {'from': owner})
+    grants = {
+        "FARMER_ROLE": farmer,
+        "PACKER_ROLE": packer or owner,
+        "LOGISTICS_ROLE": logistics or owner,
+        "RETAIL_ROLE": retail or owner,
+    }
+    for name, account in grants.items():
+        manager.grantRole(role_id(name), account, {'from': owner})
+
+
+def fund_rewards(reward_token, manager, owner, amount):
+    reward_token.approve(manager.address, amount, {'from': owner})
+    return manager.fundRewards(amount, {'from': owner})
+
+
+def mint_durians(nft, farmer, token_ids, to=None, chunk=200):
+    """用 mintDurianList 分批铸造（不写 URI）"""
+    to = to or farmer
+    token_ids = list(token_ids)
+    for i in range(0, len(token_ids), chunk):
+        nft.mintDurianList(to, token_ids[i:i + chunk], {'from': farmer})
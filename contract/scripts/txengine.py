@@ -0,0 +1,263 @@
+"""
+流水线式异步交易引擎
+
+多个账户并发签名/提交交易：本地维护 nonce，每个账户可同时挂多笔交易，
+用 asyncio 等待回执，卡住的交易以同一 nonce 提高 gasPrice 重发替换。
+
+    with TxEngine() as engine:
+        jobs = [contract_tx(owner, token, "mint", t, amount) for t in traders]
+        results = engine.run(jobs)
+
+吞吐只受出块速度限制，而不是每笔交易的往返延迟。
+"""
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from brownie import web3
+from web3.exceptions import TransactionNotFound
+
+
+@dataclass
+class Tx:
+    sender: object          # brownie Account / LocalAccount
+    to: str
+    data: str = "0x"
+    value: int = 0
+    gas: int = None
+    label: str = ""
+
+
+@dataclass
+class TxResult:
+    tx: Tx
+    nonce: int = None
+    tx_hash: str = None
+    receipt: dict = None
+    error: Exception = None
+    replacements: int = 0
+    gas_retries: int = 0
+    submitted_at: float = 0.0
+    mined_at: float = 0.0
+    hashes: list = field(default_factory=list)
+
+    @property
+    def ok(self):
+        return self.error is None and self.receipt is not None and self.receipt["status"] == 1
+
+    @property
+    def out_of_gas(self):
+        # 耗尽 gas 的失败交易 gasUsed 等于 gas 上限；普通 revert 会退还剩余 gas
+        return (self.receipt is not None and self.receipt["status"] == 0
+                and self.receipt["gasUsed"] >= self.tx.gas)
+
+    @property
+    def latency(self):
+        return self.mined_at - self.submitted_at
+
+
+def contract_tx(sender, contract, fn_name, *args, value=0, gas=None):
+    """把 contract.fn_name(*args) 编码为一个待提交的 Tx"""
+    data = getattr(contract, fn_name).encode_input(*args)
+    return Tx(sender=sender, to=contract.address, data=data, value=value, gas=gas, label=fn_name)
+
+
+def transfer_tx(sender, to, value):
+    return Tx(sender=sender, to=str(to), value=value, gas=21000, label="transfer")
+
+
+class TxEngine:
+    def __init__(
+        self,
+        max_in_flight=16,        # 每个账户同时挂起的交易数
+        replace_after=30.0,      # 多少秒无回执后提价替换
+        gas_bump=1.125,          # 替换交易的 gasPrice 倍数（节点要求至少 +10%）
+        max_replacements=3,
+        gas_margin=1.2,          # estimate_gas 的余量：在途交易会改变池子状态，LMSR 买入的 gas 随之变化
+        max_gas_retries=2,       # 耗尽 gas 后重新估算并重发的次数
+        poll_interval=0.1,
+        gas_price=None,
+        workers=32,
+    ):
+        self.max_in_flight = max_in_flight
+        self.replace_after = replace_after
+        self.gas_bump = gas_bump
+        self.max_replacements = max_replacements
+        self.gas_margin = gas_margin
+        self.max_gas_retries = max_gas_retries
+        self.poll_interval = poll_interval
+        self.gas_price = gas_price
+        self.chain_id = None
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+        self._nonces = {}
+        self._nonce_locks = {}
+        self._slots = {}
+
+    # --------- 对外接口 ---------
+
+    def run(self, jobs):
+        """同步入口：提交全部 jobs 并等待回执，按输入顺序返回 TxResult"""
+        return asyncio.run(self.submit_all(jobs))
+
+    async def submit_all(self, jobs):
+        # asyncio 原语绑定在事件循环上，每次 run 重新创建；本地 nonce 跨批次保留
+        self._slots = {}
+        self._nonce_locks = {}
+        if self.chain_id is None:
+            self.chain_id = await self._rpc(lambda: web3.eth.chain_id)
+        if self.gas_price is None:
+            self.gas_price = await self._rpc(lambda: web3.eth.gas_price)
+        return await asyncio.gather(*(self.submit(job) for job in jobs))
+
+    async def submit(self, job):
+        addr = job.sender.address
+        slots = self._slots.setdefault(addr, asyncio.Semaphore(self.max_in_flight))
+        result = TxResult(tx=job)
+        async with slots:
+            try:
+                if job.gas is None:
+                    job.gas = await self._estimate(job)
+                while True:
+                    # 取 nonce 与广播必须在同一把锁内完成，保证同账户交易按 nonce 顺序进入交易池
+                    async with self._lock(addr):
+                        result.nonce = await self._next_nonce(addr)
+                        try:
+                            await self._broadcast(job, result, self.gas_price)
+                        except Exception:
+                            await self._fill_gap(job.sender, result.nonce)
+                            raise
+                    await self._wait(job, result)
+                    if not result.out_of_gas or result.gas_retries >= self.max_gas_retries:
+                        break
+                    # 耗尽 gas：按最新状态重新估算，用新 nonce 重发
+                    result.gas_retries += 1
+                    result.receipt = None
+                    result.hashes = []
+                    result.replacements = 0
+                    job.gas = max(await self._estimate(job), int(job.gas * self.gas_margin))
+            except Exception as e:
+                result.error = e
+        return result
+
+    def reset_nonces(self):
+        self._nonces.clear()
+
+    def close(self):
+        """关闭 RPC 线程池；引擎用完后调用，或直接用 with TxEngine() as engine"""
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # --------- 内部实现 ---------
+
+    def _lock(self, addr):
+        return self._nonce_locks.setdefault(addr, asyncio.Lock())
+
+    async def _rpc(self, fn):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn)
+
+    async def _next_nonce(self, addr):
+        if addr not in self._nonces:
+            self._nonces[addr] = await self._rpc(lambda: web3.eth.get_transaction_count(addr, "pending"))
+        nonce = self._nonces[addr]
+        self._nonces[addr] = nonce + 1
+        return nonce
+
+    async def _estimate(self, job):
+        gas = await self._rpc(lambda: web3.eth.estimate_gas(self._tx_dict(job)))
+        return int(gas * self.gas_margin)
+
+    @staticmethod
+    def _tx_dict(job):
+        return {"from": job.sender.address, "to": job.to, "data": job.data, "value": job.value}
+
+    async def _broadcast(self, job, result, gas_price, nonce=None):
+        tx = self._tx_dict(job)
+        tx.update(nonce=result.nonce if nonce is None else nonce, gas=job.gas, gasPrice=gas_price,
+                  chainId=self.chain_id)
+        tx_hash = await self._rpc(lambda: self._send(job.sender, tx))
+        if not result.submitted_at:
+            result.submitted_at = time.perf_counter()
+        result.tx_hash = tx_hash
+        result.hashes.append(tx_hash)
+        return tx_hash
+
+    @staticmethod
+    def _send(sender, tx):
+        private_key = getattr(sender, "private_key", None)
+        if private_key:
+            signed = web3.eth.account.sign_transaction(tx, private_key)
+            return web3.eth.send_raw_transaction(signed.rawTransaction).hex()
+        # 开发链上的解锁账户由节点签名
+        return web3.eth.send_transaction(tx).hex()
+
+    async def _wait(self, job, result):
+        gas_price = self.gas_price
+        deadline = time.perf_counter() + self.replace_after
+        while True:
+            for tx_hash in reversed(result.hashes):
+                receipt = await self._rpc(lambda h=tx_hash: self._receipt(h))
+                if receipt is not None:
+                    result.tx_hash = tx_hash
+                    result.receipt = receipt
+                    result.mined_at = time.perf_counter()
+                    return
+            if time.perf_counter() >= deadline:
+                if result.replacements >= self.max_replacements:
+                    raise TimeoutError(f"tx {result.tx_hash} not mined after {result.replacements} replacements")
+                gas_price = int(gas_price * self.gas_bump) + 1
+                try:
+                    await self._broadcast(job, result, gas_price)
+                    result.replacements += 1
+                except ValueError:
+                    # nonce too low 等：原交易可能已被打包，继续等回执
+                    pass
+                deadline = time.perf_counter() + self.replace_after
+            await asyncio.sleep(self.poll_interval)
+
+    @staticmethod
+    def _receipt(tx_hash):
+        try:
+            return web3.eth.get_transaction_receipt(tx_hash)
+        except TransactionNotFound:
+            # 只有"尚未打包"算作等待中；其余 RPC 错误向上抛出，不能被当成 pending 一直重发
+            return None
+
+    async def _fill_gap(self, sender, nonce):
+        # 广播失败会在本地 nonce 序列里留下空洞，用一笔 0 值自转账补上，避免后续交易全部卡住
+        filler = Tx(sender=sender, to=sender.address, gas=21000, label="nonce-gap")
+        result = TxResult(tx=filler, nonce=nonce)
+        try:
+            await self._broadcast(filler, result, self.gas_price)
+        except Exception:
+            self._nonces.pop(sender.address, None)
+
+
+# --------- 常用批量流程 ---------
+
+def fund_traders(engine, owner, traders, eth_amount=0):
+    """为新账户转入 gas 费用"""
+    if not eth_amount:
+        return []
+    return engine.run([transfer_tx(owner, t.address, eth_amount) for t in traders])
+
+
+def mint_and_approve(engine, token, owner, traders, amount, spenders):
+    """给每个 trader 铸币，并对每个 spender 授权；mint 全部由 owner 发出，approve 由各 trader 并发发出"""
+    minted = engine.run([contract_tx(owner, token, "mint", t, amount) for t in traders])
+    approved = engine.run([
+        contract_tx(t, token, "approve", spender, amount)
+        for t in traders
+        for spender in spenders
+    ])
+    return minted + approved
+
+
+def claim_all(engine, prediction_market, market_id, winners):
+    """在 resolveMarket 之后，为所有赢家并发提交 claimWinnings"""
+    return engine.run([contract_tx(w, prediction_market, "claimWinnings", market_id) for w in winners])
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 让纯 Python 测试不经 brownie 也能 `import scripts.xxx`
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
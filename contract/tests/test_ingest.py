@@ -0,0 +1,137 @@
+"""阶段数据导入：位布局打包 / 解包（含有符号温度）、CSV 与 JSONL 的 dataHash 一致性、预演二分与拒绝文件"""
+import json
+
+import pytest
+
+from scripts.ingest import SCHEMAS, _preflight, data_hash, ingest, pack, parse, unpack
+
+SIGNED_LIMIT = 1 << 79   # 有符号温度字段为 80 位补码
+
+
+@pytest.mark.parametrize("phase, record", [
+    (1, {"avgTemp": -12.5, "avgHumidity": 82, "area": 3.25}),
+    (1, {"avgTemp": 29.5, "avgHumidity": 0, "area": 0}),
+    (2, {"brix": 18.3, "avgWeightKg": 2.4}),
+    (3, {"avgBoxWeightKg": 12.75, "coldChain": 1}),
+    (4, {"avgTransitTempC": -0.25, "coldChainBreaches": 3}),
+    (5, {"avgStoreTempC": -3, "unitsSold": 120, "pricePerKg": 45.5}),
+])
+def test_pack_unpack_round_trip(phase, record):
+    assert unpack(phase, pack(phase, record)) == pytest.approx(record)
+
+
+@pytest.mark.parametrize("phase, name", [(1, "avgTemp"), (4, "avgTransitTempC"), (5, "avgStoreTempC")])
+def test_signed_temperature_round_trip(phase, name):
+    for celsius in (-273.15, -40, -18.5, -0.01, 0, 0.01, 4.25, 37.5, 60):
+        assert unpack(phase, pack(phase, {name: celsius}))[name] == pytest.approx(celsius)
+    # -0.01°C → floor(-1) → 80 位补码全 1，只占自己的位段
+    field = next(f for f in SCHEMAS[phase] if f.name == name)
+    assert pack(phase, {name: -0.01}) == ((1 << field.bits) - 1) << field.offset
+
+
+def test_negative_temperature_does_not_disturb_neighbours():
+    packed = pack(5, {"avgStoreTempC": -1, "unitsSold": 7, "pricePerKg": 1})
+    assert unpack(5, packed) == {"avgStoreTempC": -1.0, "unitsSold": 7, "pricePerKg": 1.0}
+
+
+def test_positive_values_match_frontend_layout():
+    # 前端：avgTemp×100 << 176 | avgHumidity×100 << 96 | area×100
+    assert pack(1, {"avgTemp": 29.5, "avgHumidity": 82, "area": 3}) == (2950 << 176) | (8200 << 96) | 300
+
+
+@pytest.mark.parametrize("phase, record", [
+    (1, {"avgTemp": SIGNED_LIMIT / 100 * 2}),
+    (4, {"avgTransitTempC": -SIGNED_LIMIT / 100 * 2}),
+    (2, {"brix": -0.1}),
+    (3, {"coldChain": 1 << 96}),
+])
+def test_out_of_range_values_are_rejected(phase, record):
+    with pytest.raises(ValueError):
+        pack(phase, record)
+
+
+def test_csv_and_jsonl_hash_the_same_record():
+    csv_row = {"tokenId": "7", "phase": "1", "avgTemp": "29.0", "avgHumidity": "82.5", "area": "3", "cid": "bafy"}
+    jsonl = json.dumps({"tokenId": 7, "phase": 1, "avgTemp": 29, "avgHumidity": 82.5, "area": 3.0, "cid": "other"})
+    from_csv, from_jsonl = parse(csv_row), parse(jsonl)
+    assert data_hash(from_csv) == data_hash(from_jsonl)
+    assert pack(1, from_csv) == pack(1, from_jsonl)
+
+
+class _Revert(Exception):
+    pass
+
+
+class _Call:
+    def __init__(self, manager):
+        self.manager = manager
+
+    def call(self, token_ids, phases, hashes, packed, cids, tx):
+        self.manager.calls += 1
+        bad = [t for t in token_ids if t in self.manager.bad]
+        if bad:
+            raise _Revert(f"ownerOf: invalid token {bad[0]}")
+        return None
+
+
+class _Manager:
+    """只模拟 ingest 用到的接口：getFlagsBatch、submitPhaseBatch 及其 .call 预演"""
+
+    def __init__(self, bad=(), submitted=()):
+        self.bad = set(bad)
+        self.submitted = set(submitted)   # 已在链上的 (tokenId, phase)
+        self.calls = 0
+        self.sent = []
+        self.submitPhaseBatch = _Sender(self)
+
+    def getFlagsBatch(self, token_ids):
+        return [sum(1 << (p - 1) for t2, p in self.submitted if t2 == t) for t in token_ids]
+
+
+class _Sender(_Call):
+    def __call__(self, token_ids, phases, hashes, packed, cids, tx):
+        assert not self.manager.bad & set(token_ids)
+        self.manager.sent.append(list(zip(token_ids, phases)))
+        return type("Tx", (), {"gas_used": 1000 * len(token_ids)})()
+
+
+def _items(token_ids, phase=1):
+    return [(lineno, (t, phase, b"\x00" * 32, 0, "")) for lineno, t in enumerate(token_ids, 1)]
+
+
+def test_preflight_bisects_out_only_the_failing_rows():
+    manager = _Manager(bad={3, 6})
+    ok, bad = _preflight(manager, _items(range(1, 9)), sender="0xsender")
+    assert [item[0] for _, item in ok] == [1, 2, 4, 5, 7, 8]
+    assert [(lineno, item[0]) for lineno, item, _ in bad] == [(3, 3), (6, 6)]
+    assert all("invalid token" in error for *_, error in bad)
+
+
+def test_preflight_clean_batch_is_a_single_call():
+    manager = _Manager()
+    ok, bad = _preflight(manager, _items(range(1, 101)), sender="0xsender")
+    assert len(ok) == 100 and bad == []
+    assert manager.calls == 1
+
+
+def test_ingest_rejects_bad_rows_and_submits_the_rest(tmp_path):
+    path = tmp_path / "farms.jsonl"
+    rows = [
+        {"tokenId": 1, "phase": 1, "avgTemp": -2.5, "avgHumidity": 80, "area": 1},
+        {"tokenId": 2, "phase": 1, "avgTemp": 30, "avgHumidity": 80, "area": 1},    # token 不存在
+        {"tokenId": 3, "phase": 1, "avgTemp": 30, "avgHumidity": 80, "area": 1},    # 已在链上
+        {"tokenId": 1, "phase": 1, "avgTemp": 31, "avgHumidity": 80, "area": 1},    # 批内重复
+        {"tokenId": 4, "phase": 9},                                                 # 未知 phase
+    ]
+    path.write_text("\n".join(json.dumps(r) for r in rows) + "\nnot json\n", encoding="utf-8")
+    manager = _Manager(bad={2}, submitted={(3, 1)})
+
+    stats = ingest(str(path), manager, "0xsender", batch_size=10, workers=1)
+
+    assert manager.sent == [[(1, 1)]]
+    assert (stats["records"], stats["submitted"], stats["skipped"], stats["transactions"]) == (4, 1, 1, 1)
+    rejects = [json.loads(line) for line in open(stats["rejects_path"], encoding="utf-8")]
+    assert sorted(r["line"] for r in rejects) == [2, 4, 5, 6]
+    reverted = next(r for r in rejects if r["line"] == 2)
+    assert reverted["error"].startswith("submitPhaseBatch would revert")
+    assert reverted["record"]["tokenId"] == 2
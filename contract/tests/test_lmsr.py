@@ -0,0 +1,85 @@
+"""LMSR 离线报价：定点运算对照 prb-math UD60x18 的已知输出，精确路径与 float 路径互相校验"""
+import math
+
+import numpy as np
+import pytest
+
+from scripts.lmsr import (
+    UNIT,
+    LMSRQuoter,
+    exp,
+    exp2,
+    ln,
+    lmsr_buy_cost,
+    lmsr_cost,
+    lmsr_prices,
+    lmsr_shares_for_amount,
+    log2,
+)
+
+B = 100 * UNIT
+
+
+# prb-math UD60x18 的测试向量：合约里的 exp / ln 对这些输入返回的值（向下取整）
+@pytest.mark.parametrize("fn, x, expected", [
+    (exp, UNIT, 2_718281828459045234),
+    (exp, 0, UNIT),
+    (exp2, UNIT, 2 * UNIT),
+    (exp2, 3 * UNIT, 8 * UNIT),
+    (log2, 8 * UNIT, 3 * UNIT),
+    (log2, UNIT, 0),
+    (ln, 2 * UNIT, 693147180559945309),
+    (ln, UNIT, 0),
+])
+def test_fixed_point_matches_prb_math(fn, x, expected):
+    assert fn(x) == expected
+
+
+def test_exp_rejects_inputs_the_contract_rejects():
+    with pytest.raises(OverflowError):
+        exp(133_084258667509499441)
+    with pytest.raises(ValueError):
+        log2(UNIT - 1)
+
+
+def test_cost_of_empty_market_is_b_ln2():
+    assert lmsr_cost(B, 0, 0) == B * 693147180559945309 // UNIT
+
+
+@pytest.mark.parametrize("q_a, q_b", [(0, 0), (0, 700 * UNIT), (250 * UNIT, 40 * UNIT), (10_000 * UNIT, 0)])
+def test_prices_sum_to_one_and_favour_larger_side(q_a, q_b):
+    p_a, p_b = lmsr_prices(B, q_a, q_b)
+    assert p_a + p_b == UNIT
+    assert (p_a >= p_b) == (q_a >= q_b)
+
+
+@pytest.mark.parametrize("is_a", [True, False])
+def test_buy_by_amount_inverts_buy_by_shares(is_a):
+    q_a, q_b = 0, 700 * UNIT
+    for amount in (10 ** 15, UNIT, 50 * UNIT, 1000 * UNIT):
+        shares = lmsr_shares_for_amount(B, q_a, q_b, is_a, amount)
+        cost = lmsr_buy_cost(B, q_a, q_b, is_a, shares)
+        # 定点舍入只允许极小的偏差，且不会让买家多付
+        assert cost <= amount + 10 ** 6
+        assert amount - cost < 10 ** 6
+
+
+@pytest.mark.parametrize("is_a", [True, False])
+def test_exact_and_float_paths_agree(is_a):
+    q = LMSRQuoter(B, 0, 700 * UNIT)
+    shares = [10 ** 15, UNIT, 100 * UNIT, 5000 * UNIT]
+    exact = np.array([float(c) for c in q.quote_shares(is_a, shares)])
+    np.testing.assert_allclose(q.depth_curve(is_a, shares), exact, rtol=1e-9)
+
+    amounts = [10 ** 15, UNIT, 50 * UNIT, 1000 * UNIT]
+    exact = np.array([float(s) for s in q.quote_amounts(is_a, amounts)])
+    np.testing.assert_allclose(q.amount_curve(is_a, amounts), exact, rtol=1e-9)
+
+
+def test_slippage_is_zero_for_tiny_trades_and_grows_with_size():
+    q = LMSRQuoter(B)
+    slip = q.slippage(True, [0, 10 ** 9, UNIT, 100 * UNIT])
+    assert slip[0] == 0.0
+    assert abs(slip[1]) < 1e-6
+    assert slip[1] < slip[2] < slip[3]
+    assert math.isclose(q.depth_curve(True, [0])[0], 0.0, abs_tol=1e-3)
@@ -0,0 +1,133 @@
+"""Merkle 派奖：叶子编码、排序成对哈希规则（OpenZeppelin MerkleProof）与派奖分组"""
+import pytest
+from eth_abi import encode
+from eth_utils import keccak, to_checksum_address
+
+from scripts.merkle import LEAF_TYPES, MerkleTree, build_distribution, leaf_hash, verify
+
+ACCOUNT = to_checksum_address("0x" + "ab" * 20)
+
+
+def _oz_process_proof(proof, leaf):
+    # OpenZeppelin MerkleProof.processProof 的逐行翻译：_hashPair(a, b) = a < b ? keccak(a ‖ b) : keccak(b ‖ a)
+    computed = leaf
+    for node in proof:
+        a, b = int.from_bytes(computed, "big"), int.from_bytes(node, "big")
+        computed = keccak(computed + node) if a < b else keccak(node + computed)
+    return computed
+
+
+def _leaves(n):
+    return [leaf_hash(1, ACCOUNT, i * 10, [i], [1]) for i in range(1, n + 1)]
+
+
+def test_leaf_is_double_hashed_abi_encoding():
+    inner = keccak(encode(LEAF_TYPES, [7, ACCOUNT, 30, [1, 2], [1, 5]]))
+    assert leaf_hash(7, ACCOUNT, 30, [1, 2], [1, 5]) == keccak(inner)
+    assert leaf_hash(7, ACCOUNT.lower(), 30, (1, 2), (1, 5)) == keccak(inner)
+
+
+@pytest.mark.parametrize("n", [1, 2, 3, 4, 5, 7, 8, 9, 33])
+def test_every_proof_matches_openzeppelin_rule(n):
+    leaves = _leaves(n)
+    tree = MerkleTree(leaves)
+    for leaf in leaves:
+        proof = tree.proof(leaf)
+        assert verify(proof, tree.root, leaf)
+        assert _oz_process_proof(proof, leaf) == tree.root
+
+
+def test_single_leaf_root_is_the_leaf_and_proof_is_empty():
+    (leaf,) = _leaves(1)
+    tree = MerkleTree([leaf])
+    assert tree.root == leaf
+    assert tree.proof(leaf) == []
+
+
+def test_two_leaf_root_is_sorted_pair_hash_regardless_of_input_order():
+    a, b = _leaves(2)
+    lo, hi = sorted((a, b))
+    assert MerkleTree([a, b]).root == MerkleTree([b, a]).root == keccak(lo + hi)
+
+
+def test_duplicate_leaves_collapse():
+    leaves = _leaves(3)
+    assert MerkleTree(leaves + leaves[:2]).root == MerkleTree(leaves).root
+
+
+def test_tampered_claims_do_not_verify():
+    leaves = _leaves(6)
+    tree = MerkleTree(leaves)
+    proof = tree.proof(leaves[2])
+    assert not verify(proof, tree.root, leaf_hash(1, ACCOUNT, 31, [3], [1]))   # 金额被改
+    assert not verify(proof, tree.root, leaf_hash(2, ACCOUNT, 30, [3], [1]))   # 换了 epoch
+    assert not verify(proof[::-1], tree.root, leaves[2])                      # 证明顺序被打乱
+    assert not verify(tree.proof(leaves[3]), tree.root, leaves[2])            # 别人的证明
+
+
+def test_empty_tree_rejected():
+    with pytest.raises(ValueError):
+        MerkleTree([])
+
+
+class _Manager:
+    """build_distribution 用到的只读接口；flags 按 getFlags 位图布局（verified 在 bit 8+，claimed 在 bit 16+）"""
+
+    def __init__(self, flags, rewards):
+        self.flags = flags
+        self.rewards = rewards
+
+    def merkleEpoch(self):
+        return 4
+
+    def rewardForPhase(self, phase):
+        return self.rewards[phase]
+
+    def getFlagsBatch(self, token_ids):
+        return [self.flags.get(t, 0) for t in token_ids]
+
+
+class _Index:
+    def __init__(self, items):
+        self.items = items
+
+    def claimable(self, now):
+        return self.items
+
+
+def _flag(*, verified=(), claimed=()):
+    f = 0
+    for p in verified:
+        f |= 1 << (8 + p - 1)
+    for p in claimed:
+        f |= 1 << (16 + p - 1)
+    return f
+
+
+def test_build_distribution_groups_by_submitter_and_rechecks_chain():
+    alice, bob = ACCOUNT, to_checksum_address("0x" + "cd" * 20)
+    manager = _Manager(
+        flags={1: _flag(verified=(1, 2)), 2: _flag(verified=(1,)), 3: _flag(verified=(1,), claimed=(1,))},
+        rewards={p: p * 10 for p in range(1, 6)},
+    )
+    # token 3 已在链上领取（索引器落后），应被剔除
+    index = _Index([(1, 1, alice.lower()), (1, 2, alice), (2, 1, bob), (3, 1, bob)])
+    dist = build_distribution(manager, index, now=0)
+
+    assert dist["epoch"] == 5
+    claims = dist["claims"]
+    assert set(claims) == {alice, bob}
+    assert (claims[alice].tokenIds, claims[alice].phases, claims[alice].amount) == ([1, 1], [1, 2], 30)
+    assert (claims[bob].tokenIds, claims[bob].phases, claims[bob].amount) == ([2], [1], 10)
+    assert dist["total"] == 40
+    root = bytes.fromhex(dist["root"][2:])
+    for c in claims.values():
+        leaf = leaf_hash(5, c.account, c.amount, c.tokenIds, c.phases)
+        assert verify([bytes.fromhex(p[2:]) for p in c.proof], root, leaf)
+
+
+def test_build_distribution_caps_items_per_leaf_and_handles_nothing_claimable():
+    manager = _Manager(flags={t: _flag(verified=(1,)) for t in range(1, 6)}, rewards={p: 1 for p in range(1, 6)})
+    dist = build_distribution(manager, _Index([(t, 1, ACCOUNT) for t in range(1, 6)]), now=0, max_items=2)
+    assert dist["claims"][ACCOUNT].tokenIds == [1, 2]
+    assert build_distribution(manager, _Index([]), now=0) is None
@@ -0,0 +1,137 @@
+"""结算与对账：整数派奖、舍入余数 dust、其余留存 leftover 与回执里的 Transfer 解析"""
+import numpy as np
+
+from scripts.settlement import (
+    OUTCOME_A,
+    TRANSFER_TOPIC,
+    MarketBook,
+    Settlement,
+    compute_payouts,
+    reconcile,
+    settle,
+    settle_many,
+    transfers_in_receipts,
+)
+
+UNIT = 10 ** 18
+TOKEN = "0x" + "11" * 20
+ALICE = "0x" + "aa" * 20
+BOB = "0x" + "bb" * 20
+CAROL = "0x" + "cc" * 20
+
+
+def _book(market_id, holders, shares, paid, total_winning_shares, losing=0, cost=0):
+    return MarketBook(
+        market_id=market_id,
+        outcome=OUTCOME_A,
+        total_winning_shares=total_winning_shares,
+        winning_payments=sum(paid),
+        losing_payments=losing,
+        market_cost=cost,
+        holders=list(holders),
+        shares=np.asarray(shares, dtype=object),
+        paid=np.asarray(paid, dtype=object),
+    )
+
+
+def test_payouts_round_down_and_dust_is_the_remainder():
+    payouts, dust = compute_payouts([1, 1, 1], [5, 6, 7], 10, 3)
+    assert list(payouts) == [5 + 3, 6 + 3, 7 + 3]
+    assert dust == 1
+
+
+def test_dust_equals_pool_minus_pro_rata_when_holders_cover_all_shares():
+    shares = [3 * UNIT + 1, 7 * UNIT, 11 * UNIT + 5]
+    pool = 1000 * UNIT + 7
+    payouts, dust = compute_payouts(shares, [0, 0, 0], pool, sum(shares))
+    assert dust == pool - int(payouts.sum())
+    assert 0 <= dust < len(shares)
+
+
+def test_payouts_are_exact_at_wei_scale():
+    # 1e18 量级下 float 会丢精度，结果必须与 Python 大整数逐个一致
+    shares = [123456789 * UNIT + 987654321, 3 * UNIT, 10 ** 27 + 1]
+    paid = [UNIT + 1, 2, 3]
+    pool, total = 987654321987654321987654321, sum(shares) + 17
+    payouts, _ = compute_payouts(shares, paid, pool, total)
+    assert [int(p) for p in payouts] == [p + s * pool // total for s, p in zip(shares, paid)]
+
+
+def test_partial_holders_dust_only_counts_their_rounding():
+    # 持有人只占 3/10 获胜份额：dust 只算他们的取整损失，其余算 leftover
+    book = _book(1, [ALICE, BOB], [1, 2], [4, 4], total_winning_shares=10, losing=100, cost=1)
+    s = settle(book)
+    assert list(s.payouts) == [4 + 101 * 1 // 10, 4 + 101 * 2 // 10]
+    assert s.dust == (101 * 3) // 10 - (101 * 1 // 10 + 101 * 2 // 10)
+    assert s.funds == 8 + 100 + 1
+    assert s.leftover == s.funds - s.total - s.dust
+    assert s.leftover > 0
+    assert s.solvent
+
+
+def test_no_winning_shares_refunds_paid():
+    payouts, dust = compute_payouts([0, 0], [3, 4], 100, 0)
+    assert list(payouts) == [3, 4]
+    assert dust == 0
+    s = settle(_book(2, [ALICE, BOB], [0, 0], [3, 4], total_winning_shares=0, losing=100))
+    assert list(s.payouts) == [3, 4]
+    assert s.dust == 0
+    assert s.leftover == 100
+
+
+def test_settle_many_matches_settle_per_market():
+    books = [
+        _book(1, [ALICE, BOB, CAROL], [1, 1, 1], [5, 6, 7], 3, losing=9, cost=1),
+        _book(2, [ALICE], [7 * UNIT], [UNIT], 7 * UNIT, losing=3 * UNIT + 1),
+        _book(3, [], [], [], 5, losing=10),
+    ]
+    together = settle_many(books)
+    for book in books:
+        alone = settle(book)
+        got = together[book.market_id]
+        assert list(got.payouts) == list(alone.payouts)
+        assert (got.total, got.dust, got.leftover) == (alone.total, alone.dust, alone.leftover)
+    assert together[1].dust == 1 and together[1].leftover == 0
+    assert together[3].total == 0 and together[3].leftover == 10
+
+
+def test_reconcile_reports_leftover_and_mismatches():
+    s = settle(_book(1, [ALICE, BOB, CAROL], [1, 1, 1], [5, 6, 7], 3, losing=9, cost=1))
+    exact = reconcile(s, dict(zip(s.holders, (int(p) for p in s.payouts))))
+    assert exact.ok
+    assert exact.actual_total == s.total
+    assert exact.leftover == s.leftover == 0
+    assert exact.dust == 1
+
+    # CAROL 未领取：记为一条 mismatch，其应得部分留在合约里计入 leftover
+    unclaimed = reconcile(s, {ALICE: int(s.payouts[0]), BOB: int(s.payouts[1])})
+    assert unclaimed.mismatches == [(CAROL, int(s.payouts[2]), 0)]
+    assert unclaimed.leftover == int(s.payouts[2])
+
+
+def test_reconcile_flags_overpayment_as_insolvent():
+    s = Settlement(1, [ALICE], np.asarray([10], dtype=object), total=10, funds=10, dust=0, leftover=0)
+    r = reconcile(s, {ALICE: 11})
+    assert not r.ok
+    assert r.mismatches == [(ALICE, 10, 11)]
+    assert r.leftover == -1
+
+
+def _log(address, src, dst, amount, topic=TRANSFER_TOPIC):
+    pad = lambda a: "0x" + "00" * 12 + a[2:]  # noqa: E731
+    return {"address": address, "topics": [topic, pad(src), pad(dst)], "data": "0x" + amount.to_bytes(32, "big").hex()}
+
+
+def test_transfers_in_receipts_filters_token_and_parties():
+    other_token = "0x" + "22" * 20
+    receipts = [
+        {"logs": [_log(TOKEN, TOKEN, ALICE, 5), _log(TOKEN, TOKEN, ALICE, 7)]},
+        {"logs": [_log(TOKEN, TOKEN, BOB, 3), _log(other_token, TOKEN, ALICE, 100),
+                  _log(TOKEN, TOKEN, ALICE, 9, topic="0x" + "00" * 32)]},
+    ]
+    totals = transfers_in_receipts(receipts, TOKEN)
+    key = lambda a: a.lower()  # noqa: E731
+    by_dst = {key(dst): amount for (_, dst), amount in totals.items()}
+    assert by_dst == {key(ALICE): 12, key(BOB): 3}
+    only_bob = transfers_in_receipts(receipts, TOKEN, recipient=list(totals)[1][1])
+    assert list(only_bob.values()) == [3]
@@ -47,6 +47,91 @@ interface PhaseInfo {
   reward: bigint;
 }
 
+const ZERO_ADDRESS = "0x0000000000000000000000000000000000000000";
+const ZERO_HASH = "0x0000000000000000000000000000000000000000000000000000000000000000" as `0x${string}`;
+
+// Per-phase reads for managers without getProvenance (up to 4 reads per phase)
+async function loadPhasesLegacy(tokenId: string): Promise<{ readyAt: number; phases: PhaseInfo[] }> {
+  const readyAt = await readContract({
+    contract: supplyChainContract,
+    method: "function retailReadyAt(uint256 tokenId) view returns (uint64)",
+    params: [BigInt(tokenId)],
+  });
+
+  const phases: PhaseInfo[] = [];
+  for (let phase = 1; phase <= 5; phase++) {
+    try {
+      const status = await readContract({
+        contract: supplyChainContract,
+        method: "function phaseStatus(uint256 tokenId, uint8 phase) view returns (bool submitted, bool verified, bool claimed)",
+        params: [BigInt(tokenId), phase],
+      });
+
+      // Only fetch metadata if phase is submitted
+      let meta = {
+        submitter: ZERO_ADDRESS,
+        submittedAt: BigInt(0),
+        dataHash: ZERO_HASH,
+        packedData: BigInt(0),
+      };
+
+      if (status[0]) {
+        const submitMetaResult = await readContract({
+          contract: supplyChainContract,
+          method: "function submitMeta(uint256 tokenId, uint8 phase) view returns (address submitter, uint64 submittedAt, uint32 reserved)",
+          params: [BigInt(tokenId), phase],
+        });
+        const phaseDataResult = await readContract({
+          contract: supplyChainContract,
+          method: "function phaseData(uint256 tokenId, uint8 phase) view returns (bytes32 dataHash, uint256 packedData)",
+          params: [BigInt(tokenId), phase],
+        });
+        meta = {
+          submitter: submitMetaResult[0],
+          submittedAt: submitMetaResult[1],
+          dataHash: phaseDataResult[0],
+          packedData: phaseDataResult[1],
+        };
+      }
+
+      const rewardAmount = await readContract({
+        contract: supplyChainContract,
+        method: "function rewardForPhase(uint8 phase) view returns (uint256)",
+        params: [phase],
+      });
+
+      phases.push({
+        phase,
+        submitted: status[0],
+        verified: status[1],
+        claimed: status[2],
+        submitter: meta.submitter,
+        submittedAt: Number(meta.submittedAt),
+        dataHash: meta.dataHash,
+        packedData: meta.packedData,
+        cid: "", // CID is not stored on-chain, only in events
+        reward: rewardAmount,
+      });
+    } catch (error) {
+      console.error(`Error loading phase ${phase}:`, error);
+      // Add default data for this phase if error occurs
+      phases.push({
+        phase,
+        submitted: false,
+        verified: false,
+        claimed: false,
+        submitter: ZERO_ADDRESS,
+        submittedAt: 0,
+        dataHash: ZERO_HASH,
+        packedData: BigInt(0),
+        cid: "",
+        reward: BigInt(0),
+      });
+    }
+  }
+  return { readyAt: Number(readyAt), phases };
+}
+
 export default function DurianDetailPage() {
   const params = useParams();
   const tokenId = params.tokenId as string;
@@ -90,92 +175,35 @@ export default function DurianDetailPage() {
         console.log("No token URI set");
       }
 
-      // Get retail ready timestamp
-      const readyAt = await readContract({
-        contract: supplyChainContract,
-        method: "function retailReadyAt(uint256 tokenId) view returns (uint64)",
-        params: [BigInt(tokenId)],
-      });
-      setRetailReadyAt(Number(readyAt));
-
-      // Get phase data for all 5 phases
-      const phaseData: PhaseInfo[] = [];
-      for (let phase = 1; phase <= 5; phase++) {
-        try {
-          const status = await readContract({
-            contract: supplyChainContract,
-            method: "function phaseStatus(uint256 tokenId, uint8 phase) view returns (bool submitted, bool verified, bool claimed)",
-            params: [BigInt(tokenId), phase],
-          });
-
-          // Only fetch metadata if phase is submitted
-          let meta = {
-            submitter: "0x0000000000000000000000000000000000000000",
-            submittedAt: BigInt(0),
-            dataHash: "0x0000000000000000000000000000000000000000000000000000000000000000" as `0x${string}`,
-            packedData: BigInt(0),
-            cid: "",
-          };
-
-          if (status[0]) {
-            // Phase is submitted, safe to read metadata
-            // Read submitMeta (submitter, submittedAt, reserved)
-            const submitMetaResult = await readContract({
-              contract: supplyChainContract,
-              method: "function submitMeta(uint256 tokenId, uint8 phase) view returns (address submitter, uint64 submittedAt, uint32 reserved)",
-              params: [BigInt(tokenId), phase],
-            });
-
-            // Read phaseData (dataHash, packedData)
-            const phaseDataResult = await readContract({
-              contract: supplyChainContract,
-              method: "function phaseData(uint256 tokenId, uint8 phase) view returns (bytes32 dataHash, uint256 packedData)",
-              params: [BigInt(tokenId), phase],
-            });
-
-            meta = {
-              submitter: submitMetaResult[0],
-              submittedAt: submitMetaResult[1],
-              dataHash: phaseDataResult[0],
-              packedData: phaseDataResult[1],
-              cid: "", // CID is not stored on-chain, only in events
-            };
-          }
-
-          const rewardAmount = await readContract({
-            contract: supplyChainContract,
-            method: "function rewardForPhase(uint8 phase) view returns (uint256)",
-            params: [phase],
-          });
-
-          phaseData.push({
-            phase,
-            submitted: status[0],
-            verified: status[1],
-            claimed: status[2],
-            submitter: meta.submitter,
-            submittedAt: Number(meta.submittedAt),
-            dataHash: meta.dataHash,
-            packedData: meta.packedData,
-            cid: meta.cid,
-            reward: rewardAmount,
-          });
-        } catch (error) {
-          console.error(`Error loading phase ${phase}:`, error);
-          // Add default data for this phase if error occurs
-          phaseData.push({
-            phase,
-            submitted: false,
-            verified: false,
-            claimed: false,
-            submitter: "0x0000000000000000000000000000000000000000",
-            submittedAt: 0,
-            dataHash: "0x0000000000000000000000000000000000000000000000000000000000000000" as `0x${string}`,
-            packedData: BigInt(0),
-            cid: "",
-            reward: BigInt(0),
-          });
-        }
+      // Get all 5 phases and the retail unlock time in one call;
+      // managers deployed before getProvenance existed fall back to per-phase reads
+      let phaseData: PhaseInfo[];
+      try {
+        const [, readyAt, provenance] = await readContract({
+          contract: supplyChainContract,
+          method:
+            "function getProvenance(uint256 tokenId) view returns (uint32 flags, uint64 retailUnlock, (bool submitted, bool verified, bool claimed, address submitter, uint64 submittedAt, bytes32 dataHash, uint256 packedData, uint256 reward)[5] phases)",
+          params: [BigInt(tokenId)],
+        });
+        setRetailReadyAt(Number(readyAt));
+
+        phaseData = provenance.map((p, i) => ({
+          phase: i + 1,
+          submitted: p.submitted,
+          verified: p.verified,
+          claimed: p.claimed,
+          submitter: p.submitter,
+          submittedAt: Number(p.submittedAt),
+          dataHash: p.dataHash,
+          packedData: p.packedData,
+          cid: "", // CID is not stored on-chain, only in events
+          reward: p.reward,
+        }));
+      } catch (error) {
+        console.warn("getProvenance unavailable, loading phases one by one:", error);
+        const legacy = await loadPhasesLegacy(tokenId);
+        setRetailReadyAt(legacy.readyAt);
+        phaseData = legacy.phases;
       }
 
       setPhases(phaseData);